@@ -1,13 +1,43 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import logging
-from datetime import datetime
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
 
 import aiosqlite
 
-from .services.models import DetailedMessage, ReputationEntry, ReputationSummary
+from .services.models import (
+    DetailedMessage,
+    GroupRecord,
+    ManualAdjustment,
+    ReputationEntry,
+    ReputationSummary,
+    UserRecord,
+)
+
+COMMIT_INTERVAL = 0.02  # seconds to coalesce queued writes before committing
+COMMIT_BATCH_SIZE = 100  # flush immediately once this many writes are queued
+COMMIT_RETRY_MAX_DELAY = 5.0  # seconds between retries of a batch that keeps failing to commit
+COMMIT_MAX_ATTEMPTS = 5  # failed batch commits before the batch is retried row by row and bad rows dropped
+READER_POOL_SIZE = 4  # WAL lets these read concurrently with the writer
+WRITE_CACHE_SIZE = 4096  # remembered users/groups whose upserts can be skipped
+ID_FETCH_BATCH = 1024  # rows pulled per round-trip when listing broadcast ids
+SCHEMA_VERSION = 1  # stored in PRAGMA user_version; bump whenever init_models' DDL changes
+
+_CONNECTION_PRAGMAS = """
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -65536;
+    PRAGMA mmap_size = 268435456;
+    PRAGMA busy_timeout = 5000;
+    PRAGMA wal_autocheckpoint = 1000;
+"""
 
 
 def _normalized_target_expr(column: str = "target") -> str:
@@ -17,11 +47,168 @@ def _normalized_target_expr(column: str = "target") -> str:
     ).format(column=column)
 
 
+def _cache_unchanged(cache: OrderedDict[Any, Any], key: Any, value: Any) -> bool:
+    """Remember ``value`` for ``key`` and report whether it was already cached."""
+    unchanged = cache.get(key) == value
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > WRITE_CACHE_SIZE:
+        cache.popitem(last=False)
+    return unchanged
+
+
+def _summary_aggregate_sql(rollup_where: str, adjustments_where: str) -> str:
+    return f"""
+        WITH entries AS (
+            SELECT
+                COALESCE(SUM(positive), 0) AS positive,
+                COALESCE(SUM(negative), 0) AS negative,
+                COALESCE(SUM(positive_with_media), 0) AS positive_with_media,
+                COALESCE(SUM(negative_with_media), 0) AS negative_with_media,
+                COALESCE(SUM(total), 0) AS details_total
+            FROM reputation_rollup
+            WHERE {rollup_where}
+        ),
+        adjustments AS (
+            SELECT COALESCE(SUM(positive_delta), 0) AS pos_adj, COALESCE(SUM(negative_delta), 0) AS neg_adj
+            FROM manual_adjustments
+            WHERE {adjustments_where}
+        )
+        SELECT
+            entries.positive,
+            entries.negative,
+            entries.positive_with_media,
+            entries.negative_with_media,
+            entries.details_total,
+            adjustments.pos_adj,
+            adjustments.neg_adj,
+            (SELECT title FROM groups WHERE chat_id = :chat_id) AS chat_title
+        FROM entries, adjustments
+    """
+
+
+def _summary_details_sql(where_clause: str) -> str:
+    return f"""
+        SELECT
+            chat_id, message_id, sentiment, has_photo, has_media, content, author_username,
+            CAST(strftime('%s', created_at) AS INTEGER) AS created_ts
+        FROM reputation_entries
+        WHERE {where_clause}
+        ORDER BY created_at DESC
+        LIMIT :limit OFFSET :offset
+    """
+
+
+_TARGET_MATCH = f"{_normalized_target_expr('target')} = :target"
+_TARGET_CHAT_MATCH = f"{_TARGET_MATCH} AND chat_id = :chat_id"
+
+_SQL_SUMMARY_ALL = _summary_aggregate_sql("target = :target", _TARGET_MATCH)
+_SQL_SUMMARY_CHAT = _summary_aggregate_sql("target = :target AND chat_id = :chat_id", _TARGET_CHAT_MATCH)
+_SQL_DETAILS_ALL = _summary_details_sql(_TARGET_MATCH)
+_SQL_DETAILS_CHAT = _summary_details_sql(_TARGET_CHAT_MATCH)
+
+_STATISTICS_KEYS = ("active_groups", "total_entries", "total_users", "total_requests")
+_STATISTICS_COUNTS = """
+    (SELECT COUNT(*) FROM groups WHERE is_active = 1) AS active_groups,
+    (SELECT COUNT(*) FROM reputation_entries) AS total_entries,
+    (SELECT COUNT(*) FROM users) AS total_users,
+    (SELECT COUNT(*) FROM requests_log) AS total_requests
+"""
+_SQL_STATISTICS = f"SELECT {_STATISTICS_COUNTS}"
+_ENHANCED_STATISTICS_KEYS = _STATISTICS_KEYS + (
+    "positive_total",
+    "negative_total",
+    "balance_total",
+    "positive_share",
+    "first_entry_at",
+    "last_entry_at",
+    "active_days",
+    "daily_average",
+    "recent_30_days",
+    "avg_requests_per_user",
+)
+_SQL_ENHANCED_STATISTICS = f"""
+    WITH totals AS (
+        SELECT {_STATISTICS_COUNTS},
+            (SELECT COALESCE(SUM(positive), 0) FROM reputation_rollup) AS positive_total,
+            (SELECT COALESCE(SUM(negative), 0) FROM reputation_rollup) AS negative_total,
+            (SELECT MIN(created_at) FROM reputation_entries) AS first_entry,
+            (SELECT MAX(created_at) FROM reputation_entries) AS last_entry,
+            (SELECT COUNT(*) FROM reputation_entries WHERE created_at >= datetime('now', '-30 days')) AS recent
+    ),
+    span AS (
+        SELECT *, COALESCE(CAST(julianday(date(last_entry)) - julianday(date(first_entry)) AS INTEGER) + 1, 0) AS days
+        FROM totals
+    )
+    SELECT
+        active_groups,
+        total_entries,
+        total_users,
+        total_requests,
+        positive_total,
+        negative_total,
+        positive_total - negative_total,
+        COALESCE(1.0 * positive_total / NULLIF(total_entries, 0), 0.0),
+        CAST(strftime('%s', first_entry) AS INTEGER),
+        CAST(strftime('%s', last_entry) AS INTEGER),
+        days,
+        COALESCE(1.0 * total_entries / NULLIF(days, 0), 0.0),
+        recent,
+        COALESCE(1.0 * total_requests / NULLIF(total_users, 0), 0.0)
+    FROM span
+"""
+_SQL_TOP_TARGETS = """
+    SELECT
+        target,
+        SUM(total) AS total,
+        SUM(positive) AS positive,
+        SUM(negative) AS negative,
+        SUM(positive) - SUM(negative) AS balance,
+        1.0 * SUM(positive) / SUM(total) AS positive_ratio
+    FROM reputation_rollup
+    GROUP BY target
+    HAVING total > 0
+    ORDER BY total DESC
+    LIMIT ?
+"""
+_TOP_TARGET_KEYS = ("target", "total", "positive", "negative", "balance")
+
+_SQL_INSERT_REPUTATION_ENTRY = (
+    "INSERT OR IGNORE INTO reputation_entries (target, chat_id, message_id, sentiment, has_photo, has_media, "
+    "content, author_id, author_username, message_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+_SQL_PYROGRAM_ACCOUNTS = (
+    "SELECT session_name, phone_number, is_active, last_used_at, created_at FROM pyrogram_accounts "
+    "ORDER BY created_at"
+)
+_SQL_ACTIVE_PYROGRAM_ACCOUNTS = (
+    "SELECT session_name, phone_number, is_active, last_used_at, created_at FROM pyrogram_accounts "
+    "WHERE is_active = 1 ORDER BY created_at"
+)
+
+
 class Database:
     def __init__(self, path: Path) -> None:
         self._path = Path(path)
         self._conn: Optional[aiosqlite.Connection] = None
+        self._reader_conns: List[aiosqlite.Connection] = []
+        self._readers: Optional[asyncio.Queue[aiosqlite.Connection]] = None
         self._logger = logging.getLogger(__name__)
+        self._pending: List[Tuple[str, Tuple[Any, ...]]] = []
+        self._pending_event = asyncio.Event()
+        self._transaction_writes: ContextVar[Optional[List[Tuple[str, Tuple[Any, ...]]]]] = ContextVar(
+            f"database_transaction_{id(self)}", default=None
+        )
+        self._write_lock = asyncio.Lock()
+        self._commit_task: Optional[asyncio.Task[None]] = None
+        self._failed_flushes = 0
+        self._group_cache: OrderedDict[int, Tuple[Optional[str], Optional[str], str]] = OrderedDict()
+        self._user_cache: OrderedDict[int, Tuple[Optional[str], Optional[str], Optional[str]]] = OrderedDict()
+        self._last_processed_cache: OrderedDict[int, int] = OrderedDict()
+        self._paused: Optional[bool] = None
+        self._settings: Dict[str, Optional[str]] = {}
+        self._blocked_users: Set[int] = set()
 
     async def connect(self) -> None:
         self._path.parent.mkdir(parents=True, exist_ok=True)
@@ -29,23 +216,57 @@ class Database:
         self._conn.row_factory = aiosqlite.Row
         await self._conn.execute("PRAGMA foreign_keys = ON;")
         await self._conn.execute("PRAGMA journal_mode = WAL;")
+        await self._conn.executescript(_CONNECTION_PRAGMAS)
         await self.init_models()
+        self._readers = asyncio.Queue()
+        for _ in range(READER_POOL_SIZE):
+            reader = await aiosqlite.connect(f"{self._path.resolve().as_uri()}?mode=ro", uri=True)
+            reader.row_factory = aiosqlite.Row
+            await reader.executescript(_CONNECTION_PRAGMAS)
+            self._reader_conns.append(reader)
+            self._readers.put_nowait(reader)
+        self._commit_task = asyncio.create_task(self._commit_loop())
+        self._paused = None
+        await self.is_paused()
+        self._blocked_users = set(await self._fetch_ids("SELECT user_id FROM users WHERE blocked = 1"))
         self._logger.info("Connected to database at %s", self._path)
 
     async def close(self) -> None:
+        if self._commit_task is not None:
+            # Cancel only between flushes so an in-flight batch is never left half applied.
+            async with self._write_lock:
+                self._commit_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await self._commit_task
+            self._commit_task = None
+        for reader in self._reader_conns:
+            await reader.close()
+        self._reader_conns = []
+        self._readers = None
         if self._conn is not None:
+            # Each failed attempt counts towards COMMIT_MAX_ATTEMPTS, after which bad rows are dropped.
+            while self._pending:
+                with contextlib.suppress(Exception):
+                    await self.flush()
+            await self._conn.executescript("PRAGMA analysis_limit = 400; PRAGMA optimize;")
             await self._conn.close()
             self._conn = None
             self._logger.info("Database connection closed")
 
     async def init_models(self) -> None:
         assert self._conn is not None
+        async with self._conn.execute("PRAGMA user_version") as cursor:
+            (version,) = await cursor.fetchone()
+        if version >= SCHEMA_VERSION:
+            return
+        target_expr = _normalized_target_expr("target")
+        new_target_expr = _normalized_target_expr("NEW.target")
         await self._conn.executescript(
-            """
+            f"""
             CREATE TABLE IF NOT EXISTS groups (
                 chat_id INTEGER PRIMARY KEY,
-                title TEXT,
-                username TEXT,
+                title TEXT COLLATE NOCASE,
+                username TEXT COLLATE NOCASE,
                 type TEXT,
                 added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 is_active INTEGER DEFAULT 1,
@@ -64,7 +285,7 @@ class Database:
 
             CREATE TABLE IF NOT EXISTS reputation_entries (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                target TEXT NOT NULL,
+                target TEXT NOT NULL COLLATE NOCASE,
                 chat_id INTEGER NOT NULL,
                 message_id INTEGER NOT NULL,
                 sentiment TEXT NOT NULL,
@@ -80,7 +301,7 @@ class Database:
 
             CREATE TABLE IF NOT EXISTS manual_adjustments (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                target TEXT NOT NULL,
+                target TEXT NOT NULL COLLATE NOCASE,
                 chat_id INTEGER,
                 positive_delta INTEGER DEFAULT 0,
                 negative_delta INTEGER DEFAULT 0,
@@ -111,10 +332,71 @@ class Database:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
 
-            CREATE INDEX IF NOT EXISTS idx_reputation_entries_target_chat
-                ON reputation_entries(target, chat_id);
+            CREATE TABLE IF NOT EXISTS reputation_rollup (
+                target TEXT NOT NULL,
+                chat_id INTEGER NOT NULL,
+                positive INTEGER NOT NULL DEFAULT 0,
+                negative INTEGER NOT NULL DEFAULT 0,
+                positive_with_media INTEGER NOT NULL DEFAULT 0,
+                negative_with_media INTEGER NOT NULL DEFAULT 0,
+                total INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (target, chat_id)
+            ) WITHOUT ROWID;
+
+            INSERT INTO reputation_rollup
+                (target, chat_id, positive, negative, positive_with_media, negative_with_media, total)
+            SELECT
+                {target_expr},
+                chat_id,
+                SUM(sentiment = 'positive'),
+                SUM(sentiment = 'negative'),
+                SUM(sentiment = 'positive' AND (has_photo = 1 OR has_media = 1)),
+                SUM(sentiment = 'negative' AND (has_photo = 1 OR has_media = 1)),
+                COUNT(*)
+            FROM reputation_entries
+            WHERE NOT EXISTS (SELECT 1 FROM reputation_rollup)
+            GROUP BY 1, 2;
+
+            -- Only rows that were actually inserted fire the trigger, so INSERT OR IGNORE duplicates are not counted.
+            CREATE TRIGGER IF NOT EXISTS trg_reputation_rollup AFTER INSERT ON reputation_entries
+            BEGIN
+                INSERT INTO reputation_rollup
+                    (target, chat_id, positive, negative, positive_with_media, negative_with_media, total)
+                VALUES (
+                    {new_target_expr},
+                    NEW.chat_id,
+                    NEW.sentiment = 'positive',
+                    NEW.sentiment = 'negative',
+                    NEW.sentiment = 'positive' AND (NEW.has_photo = 1 OR NEW.has_media = 1),
+                    NEW.sentiment = 'negative' AND (NEW.has_photo = 1 OR NEW.has_media = 1),
+                    1
+                )
+                ON CONFLICT (target, chat_id) DO UPDATE SET
+                    positive = positive + excluded.positive,
+                    negative = negative + excluded.negative,
+                    positive_with_media = positive_with_media + excluded.positive_with_media,
+                    negative_with_media = negative_with_media + excluded.negative_with_media,
+                    total = total + 1;
+            END;
+
+            -- (target, chat_id) is already a prefix of the UNIQUE constraint's index.
+            DROP INDEX IF EXISTS idx_reputation_entries_target_chat;
             CREATE INDEX IF NOT EXISTS idx_reputation_entries_created_at
                 ON reputation_entries(created_at);
+            CREATE INDEX IF NOT EXISTS idx_rep_target_chat_created
+                ON reputation_entries({target_expr}, chat_id, created_at DESC);
+            CREATE INDEX IF NOT EXISTS idx_rep_target_created
+                ON reputation_entries({target_expr}, created_at DESC);
+            CREATE INDEX IF NOT EXISTS idx_adj_target_chat
+                ON manual_adjustments({target_expr}, chat_id);
+            CREATE INDEX IF NOT EXISTS idx_groups_active ON groups(is_active);
+            DROP INDEX IF EXISTS idx_groups_title_lc;
+            DROP INDEX IF EXISTS idx_groups_username_lc;
+            CREATE INDEX IF NOT EXISTS idx_groups_title_nocase ON groups(title COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS idx_groups_username_nocase ON groups(username COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS idx_users_blocked ON users(blocked);
+
+            PRAGMA user_version = {SCHEMA_VERSION};
             """
         )
         await self._conn.commit()
@@ -125,8 +407,150 @@ class Database:
             raise RuntimeError("Database is not connected")
         return self._conn
 
+    @contextlib.asynccontextmanager
+    async def _read(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a reader connection after trying to commit any queued writes."""
+        if self._readers is None:
+            raise RuntimeError("Database is not connected")
+        async with self._write_lock:
+            await self._try_flush_locked()
+        reader = await self._readers.get()
+        try:
+            yield reader
+        finally:
+            self._readers.put_nowait(reader)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """Commit the queued writes issued inside the block together, or drop them all if it raises.
+
+        The writes are queued when the block exits, so reads inside the block do not see them.
+        ``store_reputation_entries`` and ``set_user_blocked`` commit directly and are not part of the block.
+        """
+        if self._transaction_writes.get() is not None:
+            yield
+            return
+        writes: List[Tuple[str, Tuple[Any, ...]]] = []
+        token = self._transaction_writes.set(writes)
+        try:
+            yield
+        except BaseException:
+            self._forget_cached_state()
+            raise
+        finally:
+            self._transaction_writes.reset(token)
+        await self._enqueue(writes)
+
+    async def _execute_write(self, sql: str, params: Tuple[Any, ...]) -> None:
+        """Queue a mutation to be committed together with other pending writes."""
+        writes = self._transaction_writes.get()
+        if writes is not None:
+            writes.append((sql, params))
+            return
+        await self._enqueue([(sql, params)])
+
+    async def _enqueue(self, writes: List[Tuple[str, Tuple[Any, ...]]]) -> None:
+        if not writes:
+            return
+        self._pending.extend(writes)
+        if len(self._pending) >= COMMIT_BATCH_SIZE:
+            async with self._write_lock:
+                await self._try_flush_locked()
+        else:
+            self._pending_event.set()
+
+    async def flush(self) -> None:
+        """Commit all queued writes in a single transaction."""
+        async with self._write_lock:
+            await self._flush_locked()
+
+    async def _try_flush_locked(self) -> None:
+        """Commit queued writes unless a failed batch is waiting for the commit loop to retry it."""
+        if self._failed_flushes:
+            return
+        try:
+            await self._flush_locked()
+        except Exception:
+            # Logged and requeued by _flush_locked; the commit loop retries with backoff.
+            pass
+
+    async def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            await self.conn.execute("BEGIN")
+            index = 0
+            while index < len(pending):
+                sql = pending[index][0]
+                end = index + 1
+                while end < len(pending) and pending[end][0] == sql:
+                    end += 1
+                if end - index == 1:
+                    await self.conn.execute(sql, pending[index][1])
+                else:
+                    await self.conn.executemany(sql, [params for _, params in pending[index:end]])
+                index = end
+            await self.conn.commit()
+        except Exception:
+            with contextlib.suppress(Exception):
+                await self.conn.rollback()
+            self._failed_flushes += 1
+            if self._failed_flushes < COMMIT_MAX_ATTEMPTS:
+                # Callers have already returned, so keep the batch queued ahead of newer writes and retry it.
+                self._pending[:0] = pending
+                self._pending_event.set()
+                self._logger.exception("Failed to commit %s queued writes; will retry", len(pending))
+                raise
+            self._logger.exception("Failed to commit %s queued writes; committing them one by one", len(pending))
+            self._failed_flushes = 0
+            await self._commit_each(pending)
+            return
+        self._failed_flushes = 0
+        self._logger.debug("Committed %s queued writes", len(pending))
+
+    async def _commit_each(self, writes: List[Tuple[str, Tuple[Any, ...]]]) -> None:
+        """Commit ``writes`` one per transaction, dropping those that still fail so they cannot block the queue."""
+        for sql, params in writes:
+            try:
+                await self.conn.execute("BEGIN")
+                await self.conn.execute(sql, params)
+                await self.conn.commit()
+            except Exception:
+                with contextlib.suppress(Exception):
+                    await self.conn.rollback()
+                self._logger.exception("Dropping queued write that keeps failing: %s %r", " ".join(sql.split()), params)
+                self._forget_cached_state()
+
+    def _forget_cached_state(self) -> None:
+        """Drop in-memory state that may describe writes which will never reach the database."""
+        self._group_cache.clear()
+        self._user_cache.clear()
+        self._last_processed_cache.clear()
+        self._settings.clear()
+        self._paused = None
+
+    async def _commit_loop(self) -> None:
+        delay = COMMIT_INTERVAL
+        while True:
+            await self._pending_event.wait()
+            await asyncio.sleep(delay)
+            self._pending_event.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # _flush_locked logged the error and requeued the batch; back off before the next attempt.
+                delay = min(delay * 2, COMMIT_RETRY_MAX_DELAY)
+                self._pending_event.set()
+            else:
+                delay = COMMIT_INTERVAL
+
     async def register_group(self, chat_id: int, title: Optional[str], username: Optional[str], chat_type: str) -> None:
-        await self.conn.execute(
+        if _cache_unchanged(self._group_cache, chat_id, (title, username, chat_type)):
+            return
+        # The row may not have existed when a previous last-processed update was skipped.
+        self._last_processed_cache.pop(chat_id, None)
+        await self._execute_write(
             """
             INSERT INTO groups (chat_id, title, username, type)
             VALUES (?, ?, ?, ?)
@@ -137,19 +561,18 @@ class Database:
             """,
             (chat_id, title, username, chat_type),
         )
-        await self.conn.commit()
 
     async def deactivate_group(self, chat_id: int) -> None:
-        await self.conn.execute("UPDATE groups SET is_active = 0 WHERE chat_id = ?", (chat_id,))
-        await self.conn.commit()
+        await self._execute_write("UPDATE groups SET is_active = 0 WHERE chat_id = ?", (chat_id,))
 
     async def activate_group(self, chat_id: int) -> None:
-        await self.conn.execute("UPDATE groups SET is_active = 1 WHERE chat_id = ?", (chat_id,))
-        await self.conn.commit()
+        await self._execute_write("UPDATE groups SET is_active = 1 WHERE chat_id = ?", (chat_id,))
 
     async def ensure_user(self, user_id: int, username: Optional[str], first_name: Optional[str],
                           last_name: Optional[str]) -> None:
-        await self.conn.execute(
+        if _cache_unchanged(self._user_cache, user_id, (username, first_name, last_name)):
+            return
+        await self._execute_write(
             """
             INSERT INTO users (user_id, username, first_name, last_name)
             VALUES (?, ?, ?, ?)
@@ -160,32 +583,45 @@ class Database:
             """,
             (user_id, username, first_name, last_name),
         )
-        await self.conn.commit()
 
     async def increment_user_requests(self, user_id: int) -> None:
-        await self.conn.execute(
+        await self._execute_write(
             "UPDATE users SET request_count = request_count + 1, last_request_at = CURRENT_TIMESTAMP WHERE user_id = ?",
             (user_id,),
         )
-        await self.conn.commit()
 
-    async def set_user_blocked(self, user_id: int, blocked: bool) -> None:
-        await self.conn.execute("UPDATE users SET blocked = ? WHERE user_id = ?", (int(blocked), user_id))
-        await self.conn.commit()
+    async def set_user_blocked(self, user_id: int, blocked: bool) -> bool:
+        """Set the flag for a known user; returns False if the bot has never seen ``user_id``."""
+        # Committed directly rather than queued: _blocked_users may only change once a row was updated.
+        async with self._write_lock:
+            await self._try_flush_locked()
+            try:
+                cursor = await self.conn.execute(
+                    "UPDATE users SET blocked = ? WHERE user_id = ?", (int(blocked), user_id)
+                )
+                updated = cursor.rowcount > 0
+                await cursor.close()
+            except Exception:
+                await self.conn.rollback()
+                raise
+            else:
+                await self.conn.commit()
+        if not updated:
+            return False
+        if blocked:
+            self._blocked_users.add(user_id)
+        else:
+            self._blocked_users.discard(user_id)
+        return True
 
     async def is_user_blocked(self, user_id: int) -> bool:
-        async with self.conn.execute("SELECT blocked FROM users WHERE user_id = ?", (user_id,)) as cursor:
-            row = await cursor.fetchone()
-            if row is None:
-                return False
-            return bool(row[0])
+        return user_id in self._blocked_users
 
     async def log_request(self, user_id: int, target: str, chat_id: Optional[int]) -> None:
-        await self.conn.execute(
+        await self._execute_write(
             "INSERT INTO requests_log (user_id, target, chat_id) VALUES (?, ?, ?)",
             (user_id, target, chat_id),
         )
-        await self.conn.commit()
         self._logger.debug(
             "Logged reputation request: user_id=%s target=%s chat_id=%s",
             user_id,
@@ -193,99 +629,81 @@ class Database:
             chat_id,
         )
 
+    async def record_request(self, user_id: int, target: str, chat_id: Optional[int]) -> None:
+        """Count a served lookup for the user and log it in the same commit."""
+        async with self.transaction():
+            await self.increment_user_requests(user_id)
+            await self.log_request(user_id, target, chat_id)
+
     async def store_reputation_entries(self, entries: Iterable[ReputationEntry]) -> int:
-        if not entries:
-            self._logger.debug("No reputation entries to store")
-            return 0
-        query = (
-            "INSERT OR IGNORE INTO reputation_entries (target, chat_id, message_id, sentiment, has_photo, has_media, "
-            "content, author_id, author_username, message_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        params_iter = (
+            (
+                entry.target.lower(),
+                entry.chat_id,
+                entry.message_id,
+                entry.sentiment,
+                int(entry.has_photo),
+                int(entry.has_media),
+                entry.content,
+                entry.author_id,
+                entry.author_username,
+                int(entry.message_date.timestamp()) if entry.message_date else None,
+            )
+            for entry in entries
         )
-        count = 0
-        await self.conn.execute("BEGIN")
-        try:
-            for entry in entries:
-                self._logger.debug(
-                    "Saving reputation entry: target=%s chat_id=%s message_id=%s sentiment=%s",
-                    entry.target,
-                    entry.chat_id,
-                    entry.message_id,
-                    entry.sentiment,
-                )
-                params = (
-                    entry.target.lower(),
-                    entry.chat_id,
-                    entry.message_id,
-                    entry.sentiment,
-                    int(entry.has_photo),
-                    int(entry.has_media),
-                    entry.content,
-                    entry.author_id,
-                    entry.author_username,
-                    int(entry.message_date.timestamp()) if entry.message_date else None,
-                )
-                cursor = await self.conn.execute(query, params)
-                count += cursor.rowcount
-        except Exception:
-            await self.conn.rollback()
-            self._logger.exception("Failed to store reputation entries")
-            raise
-        else:
-            await self.conn.commit()
+        async with self._write_lock:
+            await self._try_flush_locked()
+            await self.conn.execute("BEGIN")
+            try:
+                # rowcount excludes the rollup trigger's changes, unlike total_changes.
+                cursor = await self.conn.executemany(_SQL_INSERT_REPUTATION_ENTRY, params_iter)
+                count = max(cursor.rowcount, 0)
+                await cursor.close()
+            except Exception:
+                await self.conn.rollback()
+                self._logger.exception("Failed to store reputation entries")
+                raise
+            else:
+                await self.conn.commit()
         if count:
             self._logger.info("Stored %s new reputation entries", count)
         else:
-            self._logger.debug("No new reputation entries stored (possibly duplicates)")
+            self._logger.debug("No new reputation entries stored (empty batch or duplicates)")
         return count
 
     async def add_manual_adjustment(self, target: str, chat_id: Optional[int], positive: int, negative: int,
                                     note: Optional[str], created_by: int) -> None:
-        await self.conn.execute(
+        await self._execute_write(
             """
             INSERT INTO manual_adjustments (target, chat_id, positive_delta, negative_delta, note, created_by)
             VALUES (?, ?, ?, ?, ?, ?)
             """,
             (target.lower(), chat_id, positive, negative, note, created_by),
         )
-        await self.conn.commit()
 
-    async def recent_manual_adjustments(self, limit: int = 10) -> List[Dict[str, Any]]:
+    async def recent_manual_adjustments(self, limit: int = 10) -> List[ManualAdjustment]:
         sql = (
             "SELECT target, chat_id, positive_delta, negative_delta, note, created_at, created_by "
             "FROM manual_adjustments ORDER BY created_at DESC LIMIT ?"
         )
-        result: List[Dict[str, Any]] = []
-        async with self.conn.execute(sql, (limit,)) as cursor:
-            async for row in cursor:
-                result.append(
-                    {
-                        "target": row["target"],
-                        "chat_id": row["chat_id"],
-                        "positive_delta": row["positive_delta"],
-                        "negative_delta": row["negative_delta"],
-                        "note": row["note"],
-                        "created_at": row["created_at"],
-                        "created_by": row["created_by"],
-                    }
-                )
-        return result
+        async with self._read() as conn, conn.execute(sql, (limit,)) as cursor:
+            cursor.row_factory = None
+            rows = await cursor.fetchall()
+        return [ManualAdjustment(*row) for row in rows]
 
     async def find_group_by_title(self, title: str) -> Optional[Tuple[int, str]]:
-        async with self.conn.execute(
-            "SELECT chat_id, title FROM groups WHERE lower(title) = ? OR lower(username) = ?",
-            (title.lower(), title.lower().lstrip("@")),
-        ) as cursor:
-            row = await cursor.fetchone()
-            if row is None:
-                return None
-            return row[0], row[1]
+        # Explicit collations so databases created before the columns were NOCASE still match the indexes.
+        row = await self._fetch_one(
+            "SELECT chat_id, title FROM groups WHERE title = ? COLLATE NOCASE OR username = ? COLLATE NOCASE",
+            (title, title.lstrip("@")),
+        )
+        if row is None:
+            return None
+        return row[0], row[1]
 
     async def get_group_title(self, chat_id: int) -> Optional[str]:
-        async with self.conn.execute("SELECT title FROM groups WHERE chat_id = ?", (chat_id,)) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                return row[0]
-            return None
+        row = await self._fetch_one("SELECT title FROM groups WHERE chat_id = ?", (chat_id,))
+        return row[0] if row else None
 
     async def fetch_summary(
         self,
@@ -294,89 +712,57 @@ class Database:
         limit: int = 30,
         offset: int = 0,
     ) -> ReputationSummary:
-        target_key = target.lower().lstrip("@")
-        params: List[Any] = [target_key]
-        normalized_target = _normalized_target_expr("target")
-        where_clause = f"{normalized_target} = ?"
-        if chat_id is not None:
-            where_clause += " AND chat_id = ?"
-            params.append(chat_id)
-
-        sentiment_sql = f"""
-            SELECT
-                SUM(CASE WHEN sentiment = 'positive' THEN 1 ELSE 0 END) AS positive,
-                SUM(CASE WHEN sentiment = 'negative' THEN 1 ELSE 0 END) AS negative,
-                SUM(CASE WHEN sentiment = 'positive' AND (has_photo = 1 OR has_media = 1) THEN 1 ELSE 0 END) AS positive_with_media,
-                SUM(CASE WHEN sentiment = 'negative' AND (has_photo = 1 OR has_media = 1) THEN 1 ELSE 0 END) AS negative_with_media
-            FROM reputation_entries
-            WHERE {where_clause}
-        """
-        async with self.conn.execute(sentiment_sql, params) as cursor:
-            row = await cursor.fetchone()
-            if row is None:
-                positive = negative = positive_with_media = negative_with_media = 0
-            else:
-                positive, negative, positive_with_media, negative_with_media = [row[idx] or 0 for idx in range(4)]
-
-        adj_normalized = _normalized_target_expr("target")
-        adjustment_sql = """
-            SELECT COALESCE(SUM(positive_delta), 0), COALESCE(SUM(negative_delta), 0)
-            FROM manual_adjustments
-            WHERE {normalized} = ? {chat_filter}
-        """.format(normalized=adj_normalized, chat_filter="AND chat_id = ?" if chat_id is not None else "")
-        adj_params = [target_key]
         if chat_id is not None:
-            adj_params.append(chat_id)
-        async with self.conn.execute(adjustment_sql, adj_params) as cursor:
-            row = await cursor.fetchone()
-            pos_adj, neg_adj = (row[0] or 0, row[1] or 0) if row else (0, 0)
-
-        positive = max(0, (positive or 0) + pos_adj)
-        negative = max(0, (negative or 0) + neg_adj)
-        positive_with_media = max(0, min(positive, positive_with_media))
-        negative_with_media = max(0, min(negative, negative_with_media))
-
-        details_sql = f"""
-            SELECT chat_id, message_id, sentiment, has_photo, has_media, content, author_username, created_at
-            FROM reputation_entries
-            WHERE {where_clause}
-            ORDER BY created_at DESC
-            LIMIT ? OFFSET ?
-        """
-        detail_limit = max(0, limit)
-        detail_offset = max(0, offset)
-        detail_params = params + [detail_limit, detail_offset]
-        details: List[DetailedMessage] = []
-        async with self.conn.execute(details_sql, detail_params) as cursor:
-            async for row in cursor:
-                chat_id_val = row["chat_id"]
-                message_id = row["message_id"]
-                link = build_message_link(chat_id_val, message_id)
-                details.append(
-                    DetailedMessage(
-                        message_id=message_id,
-                        chat_id=chat_id_val,
-                        sentiment=row["sentiment"],
-                        has_photo=bool(row["has_photo"]),
-                        has_media=bool(row["has_media"]),
-                        content=row["content"] or "",
-                        author_username=row["author_username"],
-                        link=link,
-                        created_at=datetime.fromisoformat(row["created_at"]),
-                    )
-                )
-
-        count_sql = f"SELECT COUNT(*) FROM reputation_entries WHERE {where_clause}"
-        async with self.conn.execute(count_sql, params) as cursor:
-            count_row = await cursor.fetchone()
-            details_total = count_row[0] if count_row else 0
+            aggregate_sql, details_sql = _SQL_SUMMARY_CHAT, _SQL_DETAILS_CHAT
+        else:
+            aggregate_sql, details_sql = _SQL_SUMMARY_ALL, _SQL_DETAILS_ALL
+        params = {
+            "target": target.lower().lstrip("@"),
+            "chat_id": chat_id,
+            "limit": max(0, limit),
+            "offset": max(0, offset),
+        }
 
-        chat_title = None
-        if chat_id is not None:
-            async with self.conn.execute("SELECT title FROM groups WHERE chat_id = ?", (chat_id,)) as cursor:
-                row = await cursor.fetchone()
-                if row:
-                    chat_title = row[0]
+        async with self._read() as conn, conn.execute(aggregate_sql, params) as cursor:
+            cursor.row_factory = None
+            # Both CTEs are ungrouped aggregates, so there is always exactly one row.
+            (
+                positive,
+                negative,
+                positive_with_media,
+                negative_with_media,
+                details_total,
+                pos_adj,
+                neg_adj,
+                chat_title,
+            ) = await cursor.fetchone()
+
+        # Rollup counters are never negative, so only the adjusted totals need a floor.
+        positive = max(0, positive + pos_adj)
+        negative = max(0, negative + neg_adj)
+        positive_with_media = min(positive, positive_with_media)
+        negative_with_media = min(negative, negative_with_media)
+
+        rows: List[Tuple[Any, ...]] = []
+        # The aggregate already carries the row count, so an out-of-range page needs no second query.
+        if params["limit"] and params["offset"] < details_total:
+            async with self._read() as conn, conn.execute(details_sql, params) as cursor:
+                cursor.row_factory = None
+                rows = await cursor.fetchall()
+        details = [
+            DetailedMessage(
+                message_id=message_id,
+                chat_id=row_chat_id,
+                sentiment=sentiment,
+                has_photo=bool(has_photo),
+                has_media=bool(has_media),
+                content=content or "",
+                author_username=author_username,
+                link=build_message_link(row_chat_id, message_id),
+                created_at=datetime.fromtimestamp(created_ts, tz=timezone.utc),
+            )
+            for row_chat_id, message_id, sentiment, has_photo, has_media, content, author_username, created_ts in rows
+        ]
 
         self._logger.debug(
             "Fetched summary: target=%s chat_id=%s positive=%s negative=%s details=%s",
@@ -400,243 +786,143 @@ class Database:
         )
 
     async def fetch_statistics(self) -> Dict[str, Any]:
-        async with self.conn.execute("SELECT COUNT(*) FROM groups WHERE is_active = 1") as cursor:
-            active_groups = (await cursor.fetchone())[0]
-        async with self.conn.execute("SELECT COUNT(*) FROM reputation_entries") as cursor:
-            total_entries = (await cursor.fetchone())[0]
-        async with self.conn.execute("SELECT COUNT(*) FROM users") as cursor:
-            total_users = (await cursor.fetchone())[0]
-        async with self.conn.execute("SELECT COUNT(*) FROM requests_log") as cursor:
-            total_requests = (await cursor.fetchone())[0]
-        return {
-            "active_groups": active_groups,
-            "total_entries": total_entries,
-            "total_users": total_users,
-            "total_requests": total_requests,
-        }
+        row = await self._fetch_one(_SQL_STATISTICS)
+        return dict(zip(_STATISTICS_KEYS, row))
 
     async def fetch_enhanced_statistics(self, top_limit: int = 5) -> Dict[str, Any]:
-        base_stats = await self.fetch_statistics()
-
-        async with self.conn.execute(
-            """
-            SELECT
-                COALESCE(SUM(CASE WHEN sentiment = 'positive' THEN 1 ELSE 0 END), 0) AS positive_total,
-                COALESCE(SUM(CASE WHEN sentiment = 'negative' THEN 1 ELSE 0 END), 0) AS negative_total,
-                MIN(created_at) AS first_entry,
-                MAX(created_at) AS last_entry
-            FROM reputation_entries
-            """
-        ) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                positive_total = row["positive_total"] or 0
-                negative_total = row["negative_total"] or 0
-                first_raw = row["first_entry"]
-                last_raw = row["last_entry"]
-            else:
-                positive_total = negative_total = 0
-                first_raw = last_raw = None
-
-        first_entry = datetime.fromisoformat(first_raw) if first_raw else None
-        last_entry = datetime.fromisoformat(last_raw) if last_raw else None
-
-        total_entries = base_stats["total_entries"]
-        active_days = 0
-        if first_entry and last_entry:
-            active_days = max((last_entry.date() - first_entry.date()).days + 1, 1)
-        daily_average = (total_entries / active_days) if active_days else 0.0
-        balance_total = positive_total - negative_total
-        positive_share = round((positive_total / total_entries) * 100) if total_entries else 0
-
-        async with self.conn.execute(
-            """
-            SELECT COUNT(*) AS recent_count
-            FROM reputation_entries
-            WHERE created_at >= datetime('now', '-30 days')
-            """
-        ) as cursor:
-            row = await cursor.fetchone()
-            recent_30_days = row["recent_count"] if row else 0
-
-        top_limit = max(1, top_limit)
-        top_sql = """
-            SELECT
-                target,
-                SUM(CASE WHEN sentiment = 'positive' THEN 1 ELSE 0 END) AS positive,
-                SUM(CASE WHEN sentiment = 'negative' THEN 1 ELSE 0 END) AS negative,
-                COUNT(*) AS total
-            FROM reputation_entries
-            GROUP BY target
-            HAVING total > 0
-            ORDER BY total DESC
-            LIMIT ?
-        """
-        top_targets: List[Dict[str, Any]] = []
-        async with self.conn.execute(top_sql, (top_limit,)) as cursor:
-            async for row in cursor:
-                total = row["total"] or 0
-                if total <= 0:
-                    continue
-                positive = row["positive"] or 0
-                negative = row["negative"] or 0
-                balance = positive - negative
-                share = round((positive / total) * 100) if total else 0
-                top_targets.append(
-                    {
-                        "target": row["target"],
-                        "total": total,
-                        "positive": positive,
-                        "negative": negative,
-                        "balance": balance,
-                        "positive_share": share,
-                    }
-                )
-
-        total_users = base_stats["total_users"]
-        total_requests = base_stats["total_requests"]
-        avg_requests_per_user = (
-            (total_requests / total_users) if total_users else 0.0
-        )
-
-        base_stats.update(
-            {
-                "positive_total": positive_total,
-                "negative_total": negative_total,
-                "balance_total": balance_total,
-                "positive_share": positive_share,
-                "first_entry_at": first_entry,
-                "last_entry_at": last_entry,
-                "active_days": active_days,
-                "daily_average": daily_average,
-                "recent_30_days": recent_30_days,
-                "avg_requests_per_user": avg_requests_per_user,
-                "top_targets": top_targets,
-            }
-        )
-        return base_stats
-
-    async def top_users(self, limit: int = 10) -> List[Dict[str, Any]]:
+        row = await self._fetch_one(_SQL_ENHANCED_STATISTICS)
+        stats: Dict[str, Any] = dict(zip(_ENHANCED_STATISTICS_KEYS, row))
+        # Shares are rounded in Python: round() rounds halves to even, unlike SQLite's ROUND().
+        stats["positive_share"] = round(stats["positive_share"] * 100)
+        for key in ("first_entry_at", "last_entry_at"):
+            if stats[key] is not None:
+                stats[key] = datetime.fromtimestamp(stats[key], tz=timezone.utc)
+
+        async with self._read() as conn, conn.execute(_SQL_TOP_TARGETS, (max(1, top_limit),)) as cursor:
+            cursor.row_factory = None
+            rows = await cursor.fetchall()
+        stats["top_targets"] = [
+            dict(zip(_TOP_TARGET_KEYS, values), positive_share=round(ratio * 100)) for *values, ratio in rows
+        ]
+        return stats
+
+    async def top_users(self, limit: int = 10) -> List[UserRecord]:
         sql = (
             "SELECT user_id, username, first_name, last_name, request_count, blocked, last_request_at "
             "FROM users ORDER BY request_count DESC LIMIT ?"
         )
-        result: List[Dict[str, Any]] = []
-        async with self.conn.execute(sql, (limit,)) as cursor:
-            async for row in cursor:
-                result.append({
-                    "user_id": row["user_id"],
-                    "username": row["username"],
-                    "first_name": row["first_name"],
-                    "last_name": row["last_name"],
-                    "request_count": row["request_count"],
-                    "blocked": bool(row["blocked"]),
-                    "last_request_at": row["last_request_at"],
-                })
+        async with self._read() as conn, conn.execute(sql, (limit,)) as cursor:
+            cursor.row_factory = None
+            rows = await cursor.fetchall()
+        return [
+            UserRecord(user_id, username, first_name, last_name, request_count, bool(blocked), last_request_at)
+            for user_id, username, first_name, last_name, request_count, blocked, last_request_at in rows
+        ]
+
+    async def _fetch_one(self, sql: str, params: Tuple[Any, ...] = ()) -> Optional[Tuple[Any, ...]]:
+        async with self._read() as conn, conn.execute(sql, params) as cursor:
+            cursor.row_factory = None
+            return await cursor.fetchone()
+
+    async def _fetch_ids(self, sql: str) -> List[int]:
+        result: List[int] = []
+        async with self._read() as conn, conn.execute(sql) as cursor:
+            cursor.row_factory = None
+            while rows := await cursor.fetchmany(ID_FETCH_BATCH):
+                result.extend(row[0] for row in rows)
         return result
 
     async def active_group_ids(self) -> List[int]:
-        result: List[int] = []
-        async with self.conn.execute("SELECT chat_id FROM groups WHERE is_active = 1") as cursor:
-            async for row in cursor:
-                result.append(row["chat_id"])
-        return result
+        return await self._fetch_ids("SELECT chat_id FROM groups WHERE is_active = 1")
 
     async def active_user_ids(self) -> List[int]:
-        result: List[int] = []
-        async with self.conn.execute("SELECT user_id FROM users WHERE blocked = 0") as cursor:
-            async for row in cursor:
-                result.append(row["user_id"])
-        return result
+        return await self._fetch_ids("SELECT user_id FROM users WHERE blocked = 0")
 
-    async def list_groups(self) -> List[Dict[str, Any]]:
-        result: List[Dict[str, Any]] = []
+    async def list_groups(self) -> List[GroupRecord]:
         sql = "SELECT chat_id, title, username, is_active, added_at FROM groups ORDER BY added_at DESC"
-        async with self.conn.execute(sql) as cursor:
-            async for row in cursor:
-                result.append({
-                    "chat_id": row["chat_id"],
-                    "title": row["title"],
-                    "username": row["username"],
-                    "is_active": bool(row["is_active"]),
-                    "added_at": row["added_at"],
-                })
-        return result
+        async with self._read() as conn, conn.execute(sql) as cursor:
+            cursor.row_factory = None
+            rows = await cursor.fetchall()
+        return [
+            GroupRecord(chat_id, title, username, bool(is_active), added_at)
+            for chat_id, title, username, is_active, added_at in rows
+        ]
 
     async def toggle_pause(self, value: bool) -> None:
-        await self.conn.execute(
+        await self._execute_write(
             "INSERT INTO settings(key, value) VALUES('paused', ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
             ("1" if value else "0",),
         )
-        await self.conn.commit()
+        self._paused = value
+        self._settings.pop("paused", None)
         self._logger.info("Bot pause state set to %s", value)
 
     async def is_paused(self) -> bool:
-        async with self.conn.execute("SELECT value FROM settings WHERE key = 'paused'") as cursor:
-            row = await cursor.fetchone()
-            if row is None:
-                return False
-            paused = row["value"] == "1"
-            self._logger.debug("Pause state queried: %s", paused)
-            return paused
+        if self._paused is None:
+            row = await self._fetch_one("SELECT value FROM settings WHERE key = 'paused'")
+            self._paused = row is not None and row[0] == "1"
+            self._logger.debug("Pause state loaded: %s", self._paused)
+        return self._paused
 
     async def set_last_processed_message(self, chat_id: int, message_id: int) -> None:
-        await self.conn.execute(
+        if _cache_unchanged(self._last_processed_cache, chat_id, message_id):
+            return
+        await self._execute_write(
             "UPDATE groups SET last_processed_message_id = ? WHERE chat_id = ?",
             (message_id, chat_id),
         )
-        await self.conn.commit()
 
     async def last_processed_message(self, chat_id: int) -> Optional[int]:
-        async with self.conn.execute(
-            "SELECT last_processed_message_id FROM groups WHERE chat_id = ?",
-            (chat_id,),
-        ) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                return row[0]
-            return None
+        row = await self._fetch_one("SELECT last_processed_message_id FROM groups WHERE chat_id = ?", (chat_id,))
+        return row[0] if row else None
 
     async def set_setting(self, key: str, value: Optional[str]) -> None:
+        self._settings[key] = value
         if value is None:
-            await self.conn.execute("DELETE FROM settings WHERE key = ?", (key,))
+            await self._execute_write("DELETE FROM settings WHERE key = ?", (key,))
         else:
-            await self.conn.execute(
+            await self._execute_write(
                 "INSERT INTO settings(key, value) VALUES(?, ?) "
                 "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
                 (key, value),
             )
-        await self.conn.commit()
 
     async def get_setting(self, key: str) -> Optional[str]:
-        async with self.conn.execute("SELECT value FROM settings WHERE key = ?", (key,)) as cursor:
-            row = await cursor.fetchone()
-            if row:
-                return row[0]
-        return None
+        # Every settings write goes through set_setting on this instance, so cached values never go stale.
+        if key not in self._settings:
+            row = await self._fetch_one("SELECT value FROM settings WHERE key = ?", (key,))
+            self._settings[key] = row[0] if row else None
+        return self._settings[key]
+
+    async def get_settings(self, *keys: str) -> Dict[str, Optional[str]]:
+        missing = [key for key in keys if key not in self._settings]
+        if missing:
+            sql = f"SELECT key, value FROM settings WHERE key IN ({', '.join('?' * len(missing))})"
+            async with self._read() as conn, conn.execute(sql, missing) as cursor:
+                cursor.row_factory = None
+                found = dict(await cursor.fetchall())
+            for key in missing:
+                self._settings[key] = found.get(key)
+        return {key: self._settings[key] for key in keys}
 
     async def list_pyrogram_accounts(self, only_active: bool = False) -> List[Dict[str, Any]]:
-        sql = "SELECT session_name, phone_number, is_active, last_used_at, created_at FROM pyrogram_accounts"
-        params: tuple = ()
-        if only_active:
-            sql += " WHERE is_active = 1"
-        sql += " ORDER BY created_at"
-        accounts: List[Dict[str, Any]] = []
-        async with self.conn.execute(sql, params) as cursor:
-            async for row in cursor:
-                accounts.append(
-                    {
-                        "session_name": row["session_name"],
-                        "phone_number": row["phone_number"],
-                        "is_active": bool(row["is_active"]),
-                        "last_used_at": row["last_used_at"],
-                        "created_at": row["created_at"],
-                    }
-                )
-        return accounts
+        sql = _SQL_ACTIVE_PYROGRAM_ACCOUNTS if only_active else _SQL_PYROGRAM_ACCOUNTS
+        async with self._read() as conn, conn.execute(sql) as cursor:
+            cursor.row_factory = None
+            rows = await cursor.fetchall()
+        return [
+            {
+                "session_name": session_name,
+                "phone_number": phone_number,
+                "is_active": bool(is_active),
+                "last_used_at": last_used_at,
+                "created_at": created_at,
+            }
+            for session_name, phone_number, is_active, last_used_at, created_at in rows
+        ]
 
     async def add_pyrogram_account(self, session_name: str, phone_number: Optional[str]) -> None:
-        await self.conn.execute(
+        await self._execute_write(
             """
             INSERT INTO pyrogram_accounts (session_name, phone_number, is_active)
             VALUES (?, ?, 1)
@@ -646,25 +932,29 @@ class Database:
             """,
             (session_name, phone_number),
         )
-        await self.conn.commit()
 
     async def deactivate_pyrogram_account(self, session_name: str) -> None:
-        await self.conn.execute(
+        await self._execute_write(
             "UPDATE pyrogram_accounts SET is_active = 0 WHERE session_name = ?",
             (session_name,),
         )
-        await self.conn.commit()
 
     async def mark_pyrogram_account_used(self, session_name: str) -> None:
-        await self.conn.execute(
+        await self._execute_write(
             "UPDATE pyrogram_accounts SET last_used_at = CURRENT_TIMESTAMP WHERE session_name = ?",
             (session_name,),
         )
-        await self.conn.commit()
+
+
+_SUPERGROUP_ID_OFFSET = 1_000_000_000_000  # supergroup ids are -(10**12 + internal_id)
+
+
+@lru_cache(maxsize=256)
+def _chat_link_prefix(chat_id: int) -> str:
+    if chat_id < -_SUPERGROUP_ID_OFFSET:
+        return f"https://t.me/c/{-chat_id - _SUPERGROUP_ID_OFFSET}"
+    return f"https://t.me/{chat_id}"
 
 
 def build_message_link(chat_id: int, message_id: int) -> str:
-    if str(chat_id).startswith("-100"):
-        internal_id = str(chat_id)[4:]
-        return f"https://t.me/c/{internal_id}/{message_id}"
-    return f"https://t.me/{chat_id}/{message_id}"
+    return f"{_chat_link_prefix(chat_id)}/{message_id}"
@@ -1,61 +1,91 @@
 from __future__ import annotations
 
+import asyncio
 import hashlib
-import shlex
+import logging
+import re
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime
-from pathlib import Path
-from typing import Any, Dict, Literal, Optional
+from functools import lru_cache, wraps
+from itertools import count
+from typing import Any, Awaitable, Callable, Dict, Literal, Optional, Union
 
 from aiogram import Bot, F, Router
 from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
-from pyrogram import Client, errors
+from pyrogram import Client
+from pyrogram.errors import FloodWait, PasswordHashInvalid, PhoneCodeInvalid, PhoneNumberInvalid, SessionPasswordNeeded
 
 from ..config import Settings
 from ..database import Database
 from ..services.account_pool import PyrogramAccountPool
 from ..services.formatters import build_detail_keyboard, escape_html, format_summary
+from ..services.models import GroupRecord, UserRecord
 
 router = Router(name="admin")
-
-
-@dataclass
+logger = logging.getLogger(__name__)
+
+STATS_TOKEN_CACHE_SIZE = 4096  # live stats-button tokens kept before the oldest are evicted
+STATS_TOKEN_TTL = 3600  # seconds a stats-button token stays valid after it was last shown or used
+RENDER_CACHE_SIZE = 32  # recent admin list/stats renders reused while the data is unchanged
+LAST_RENDER_CACHE_SIZE = 1024  # admin panel messages whose last rendered content is remembered
+BROADCAST_CONCURRENCY = 25  # worker tasks sending copies in parallel
+BROADCAST_RATE = 25  # copies started per second, below the Bot API's ~30 msg/s limit
+BROADCAST_RETRIES = 3  # attempts per recipient when Telegram answers with RetryAfter
+PENDING_TTL = 1800  # seconds an unfinished admin dialog (login, broadcast, adjustment) stays alive
+READ_CACHE_TTL = 5.0  # seconds admin panel reads are reused across repeated "Обновить" presses
+
+_NON_DIGITS = re.compile(r"\D+")
+_STATS_TARGET_CALLBACK = re.compile(r"admin:stats:target:([^:]+)")
+_USER_ACTION_CALLBACK = re.compile(r"admin:user:(block|unblock):([0-9]+)")
+_GROUP_ACTION_CALLBACK = re.compile(r"admin:group:drop:(-?[0-9]+)")
+# Session files outlive the process, so seed from the clock in ms and count up to keep names unique.
+_SESSION_IDS = count(time.time_ns() // 1_000_000)
+_FLOOD_WAIT_TEXT = "Too many attempts. Try again in {} seconds."
+
+
+def _parse_int(value: str) -> Optional[int]:
+    # isdecimal() only passes strings int() can parse; isdigit() would also let "²" through and raise.
+    digits = value[1:] if value[:1] in ("+", "-") else value
+    return int(value) if digits.isdecimal() else None
+
+
+@dataclass(slots=True)
 class PendingReputation:
     stage: Literal["await_data"]
     prompt_message_id: int
+    started_at: float = field(default_factory=time.monotonic)
 
 
-@dataclass
+@dataclass(slots=True)
 class PendingBroadcast:
     scope: Literal["groups", "users"]
-    stage: Literal[
-        "await_content",
-        "await_button_choice",
-        "await_button_text",
-        "await_button_url",
-    ]
+    stage: Literal["await_content", "await_button_choice", "await_button"]
     prompt_message_id: int
     content_chat_id: Optional[int] = None
     content_message_id: Optional[int] = None
     button_text: Optional[str] = None
     button_url: Optional[str] = None
+    started_at: float = field(default_factory=time.monotonic)
 
 
-pending_reputation: Dict[int, PendingReputation] = {}
-pending_broadcast: Dict[int, PendingBroadcast] = {}
-stats_target_cache: Dict[str, str] = {}
+stats_target_cache: OrderedDict[str, tuple[str, float]] = OrderedDict()
+read_cache: Dict[str, tuple[float, Any]] = {}
+last_render: OrderedDict[tuple[int, int], bytes] = OrderedDict()
 
 
-@dataclass
+@dataclass(slots=True)
 class PendingApiConfig:
     stage: Literal["await_credentials"]
     prompt_message_id: int
+    started_at: float = field(default_factory=time.monotonic)
 
 
-@dataclass
+@dataclass(slots=True)
 class PendingAccount:
     stage: Literal["await_phone", "await_code", "await_password"]
     prompt_message_id: int
@@ -64,10 +94,15 @@ class PendingAccount:
     phone_code_hash: Optional[str] = None
     client: Optional[Client] = None
     code_buffer: str = ""
+    started_at: float = field(default_factory=time.monotonic)
 
 
-pending_api: Dict[int, PendingApiConfig] = {}
-pending_accounts: Dict[int, PendingAccount] = {}
+PendingState = Union[PendingReputation, PendingBroadcast, PendingApiConfig, PendingAccount]
+
+# One dialog per admin: starting a new one replaces whatever the admin left unfinished.
+pending: Dict[int, PendingState] = {}
+# Strong references to running broadcasts; the event loop only keeps weak ones.
+broadcast_tasks: set[asyncio.Task[None]] = set()
 
 
 def _code_prompt_text(code: str) -> str:
@@ -78,7 +113,7 @@ def _code_prompt_text(code: str) -> str:
     )
 
 
-def _build_code_input_keyboard(code: str) -> InlineKeyboardMarkup:
+def _make_code_input_keyboard() -> InlineKeyboardMarkup:
     rows = [
         [
             InlineKeyboardButton(text="1", callback_data="admin:accounts:code:add:1"),
@@ -106,14 +141,73 @@ def _build_code_input_keyboard(code: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+_CODE_INPUT_KB = _make_code_input_keyboard()
+
+
+async def _start_pending(user_id: int, state: PendingState) -> None:
+    await _reset_pending_account(user_id)
+    pending[user_id] = state
+
+
+def _finish_pending(user_id: int, state: PendingState) -> None:
+    # Only drop the dialog that finished; the admin may have started another one while it ran.
+    if pending.get(user_id) is state:
+        del pending[user_id]
+
+
+async def _disconnect_quietly(client: Client) -> None:
+    try:
+        await asyncio.wait_for(client.disconnect(), timeout=2)
+    except Exception:
+        pass
+
+
 async def _reset_pending_account(user_id: int) -> None:
-    state = pending_accounts.pop(user_id, None)
-    if state and state.client:
-        try:
-            await state.client.disconnect()
-        except Exception:
-            pass
+    state = pending.get(user_id)
+    if not isinstance(state, PendingAccount):
+        return
+    del pending[user_id]
+    if state.client:
+        await _disconnect_quietly(state.client)
+
 
+async def _fail_account_login(message: Message, user_id: int, text: str, client: Optional[Client] = None) -> None:
+    await message.reply(text)
+    if client is not None:
+        await _disconnect_quietly(client)
+    await _reset_pending_account(user_id)
+
+
+async def _complete_account_login(
+    user_id: int,
+    state: PendingAccount,
+    client: Client,
+    db: Database,
+    account_pool: PyrogramAccountPool,
+) -> None:
+    _finish_pending(user_id, state)
+    session_name = state.session_name or f"account_{next(_SESSION_IDS)}"
+    await asyncio.gather(client.disconnect(), db.add_pyrogram_account(session_name, state.phone_number))
+    # The pool re-reads accounts through the read connections, which only see committed rows.
+    await db.flush()
+    await account_pool.refresh()
+
+
+async def _expire_pending(user_id: int) -> None:
+    state = pending.get(user_id)
+    if state is None or state.started_at >= time.monotonic() - PENDING_TTL:
+        return
+    if isinstance(state, PendingAccount):
+        # Abandoned logins keep a connected Pyrogram client; close it instead of holding the socket forever.
+        await _reset_pending_account(user_id)
+    else:
+        del pending[user_id]
+
+
+@lru_cache(maxsize=2048)
+def _escape_name(text: str) -> str:
+    # Usernames, group titles and targets repeat across every refresh of the admin lists.
+    return escape_html(text)
 
 
 def _format_date(value: Optional[datetime]) -> Optional[str]:
@@ -123,69 +217,129 @@ def _format_date(value: Optional[datetime]) -> Optional[str]:
 
 
 def format_enhanced_statistics(stats: Dict[str, Any]) -> str:
-    lines = ["📊 <b>Статистика</b>"]
-    lines.append(f"Активных групп: <b>{stats['active_groups']}</b>")
-    lines.append(f"Всего отзывов: <b>{stats['total_entries']}</b>")
-    lines.append(
-        f"Положительных: <b>{stats['positive_total']}</b> · Отрицательных: <b>{stats['negative_total']}</b>"
-    )
-    lines.append(
-        f"Баланс: <b>{stats['balance_total']:+d}</b> · Доля позитивных: <b>{stats['positive_share']}%</b>"
+    fingerprint = (
+        tuple(item for item in stats.items() if item[0] != "top_targets"),
+        tuple(tuple(target.items()) for target in stats["top_targets"]),
     )
-    lines.append(
-        "Пользователей: "
-        f"<b>{stats['total_users']}</b> (≈ {stats['avg_requests_per_user']:.1f} запросов на человека)"
-    )
-    lines.append(f"Всего запросов: <b>{stats['total_requests']}</b>")
+    return _format_enhanced_statistics(fingerprint)
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _format_enhanced_statistics(
+    fingerprint: tuple[tuple[tuple[str, Any], ...], tuple[tuple[tuple[str, Any], ...], ...]],
+) -> str:
+    scalars, top_targets = fingerprint
+    stats: Dict[str, Any] = dict(scalars)
     first_formatted = _format_date(stats.get("first_entry_at"))
     last_formatted = _format_date(stats.get("last_entry_at"))
-    if first_formatted and last_formatted:
-        lines.append(
-            f"Период наблюдений: <b>{first_formatted}</b> – <b>{last_formatted}</b>"
-            f" ({stats['active_days']} дн.)"
+    period = (
+        f"Период наблюдений: <b>{first_formatted}</b> – <b>{last_formatted}</b> ({stats['active_days']} дн.)\n"
+        if first_formatted and last_formatted
+        else ""
+    )
+    if top_targets:
+        rows = "\n".join(
+            f"{index}. <code>{_escape_name(item['target'])}</code> — {item['total']} шт."
+            f" (баланс {item['balance']:+d}, 🟢 {item['positive_share']}%)"
+            for index, item in enumerate(map(dict, top_targets), start=1)
+        )
+        footer = (
+            f"🏅 <b>ТОП участников по отзывам</b>\n{rows}\n\n"
+            "Выберите участника кнопкой ниже, чтобы открыть подробный отчёт."
         )
-    lines.append(f"Средний поток в день: <b>{stats['daily_average']:.1f}</b>")
-    lines.append(f"Добавлено за 30 дней: <b>{stats['recent_30_days']}</b>")
-    if stats['top_targets']:
-        lines.append("")
-        lines.append("🏅 <b>ТОП участников по отзывам</b>")
-        for index, item in enumerate(stats['top_targets'], start=1):
-            target = escape_html(item['target'])
-            lines.append(
-                f"{index}. <code>{target}</code> — {item['total']} шт."
-                f" (баланс {item['balance']:+d}, 🟢 {item['positive_share']}%)"
-            )
-        lines.append("")
-        lines.append("Выберите участника кнопкой ниже, чтобы открыть подробный отчёт.")
     else:
-        lines.append("")
-        lines.append("Пока нет участников с отзывами.")
-    return "\n".join(lines)
+        footer = "Пока нет участников с отзывами."
+    return (
+        "📊 <b>Статистика</b>\n"
+        f"Активных групп: <b>{stats['active_groups']}</b>\n"
+        f"Всего отзывов: <b>{stats['total_entries']}</b>\n"
+        f"Положительных: <b>{stats['positive_total']}</b> · Отрицательных: <b>{stats['negative_total']}</b>\n"
+        f"Баланс: <b>{stats['balance_total']:+d}</b> · Доля позитивных: <b>{stats['positive_share']}%</b>\n"
+        f"Пользователей: <b>{stats['total_users']}</b>"
+        f" (≈ {stats['avg_requests_per_user']:.1f} запросов на человека)\n"
+        f"Всего запросов: <b>{stats['total_requests']}</b>\n"
+        f"{period}"
+        f"Средний поток в день: <b>{stats['daily_average']:.1f}</b>\n"
+        f"Добавлено за 30 дней: <b>{stats['recent_30_days']}</b>\n"
+        f"\n{footer}"
+    )
 
 
-def build_stats_keyboard(top_targets: list[dict[str, Any]]) -> InlineKeyboardMarkup:
-    inline_keyboard: list[list[InlineKeyboardButton]] = []
-    if len(stats_target_cache) > 1000:
-        stats_target_cache.clear()
-    for index, item in enumerate(top_targets, start=1):
-        target = item["target"]
-        token = hashlib.sha1(target.lower().encode("utf-8")).hexdigest()[:10]
-        stats_target_cache[token] = target
-        label_target = target if len(target) <= 24 else f"{target[:23]}…"
-        inline_keyboard.append(
-            [
-                InlineKeyboardButton(
-                    text=f"{index}. {label_target} ({item['total']})",
-                    callback_data=f"admin:stats:target:{token}",
-                )
-            ]
+async def _cached_read(key: str, load: Callable[[], Awaitable[Any]]) -> Any:
+    now = time.monotonic()
+    cached = read_cache.get(key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    value = await load()
+    read_cache[key] = (now + READ_CACHE_TTL, value)
+    return value
+
+
+def _invalidate_reads(*keys: str) -> None:
+    for key in keys:
+        read_cache.pop(key, None)
+
+
+@lru_cache(maxsize=STATS_TOKEN_CACHE_SIZE)
+def _stats_token(target: str) -> str:
+    # Tokens only need to tell apart the targets currently on screen; 5 bytes give the same 10 hex chars.
+    return hashlib.blake2b(target.encode("utf-8"), digest_size=5).hexdigest()
+
+
+def _remember_stats_target(token: str, target: str) -> None:
+    stats_target_cache[token] = (target, time.monotonic() + STATS_TOKEN_TTL)
+    stats_target_cache.move_to_end(token)
+    while len(stats_target_cache) > STATS_TOKEN_CACHE_SIZE:
+        stats_target_cache.popitem(last=False)
+
+
+def _lookup_stats_target(token: str) -> Optional[str]:
+    cached = stats_target_cache.get(token)
+    if cached is None:
+        return None
+    target, expires_at = cached
+    if expires_at < time.monotonic():
+        del stats_target_cache[token]
+        return None
+    _remember_stats_target(token, target)
+    return target
+
+
+_STATS_FOOTER_ROW = [
+    InlineKeyboardButton(text="🔄 Обновить", callback_data="admin:stats:refresh"),
+    InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home"),
+]
+_USERS_FOOTER_ROW = [
+    InlineKeyboardButton(text="🔄 Обновить", callback_data="admin:users:refresh"),
+    InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home"),
+]
+_GROUPS_FOOTER_ROW = [
+    InlineKeyboardButton(text="🔄 Обновить", callback_data="admin:groups:refresh"),
+    InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home"),
+]
+
+
+def _stats_target_row(index: int, target: str, total: int) -> list[InlineKeyboardButton]:
+    label_target = target if len(target) <= 24 else f"{target[:23]}…"
+    return [
+        InlineKeyboardButton(
+            text=f"{index}. {label_target} ({total})", callback_data=f"admin:stats:target:{_stats_token(target)}"
         )
-    inline_keyboard.append(
-        [
-            InlineKeyboardButton(text="🔄 Обновить", callback_data="admin:stats:refresh"),
-            InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home"),
-        ]
-    )
+    ]
+
+
+def build_stats_keyboard(top_targets: list[dict[str, Any]]) -> InlineKeyboardMarkup:
+    rows = tuple((item["target"], item["total"]) for item in top_targets)
+    # Registering tokens stays outside the render cache so every shown button keeps its token alive.
+    for target, _ in rows:
+        _remember_stats_target(_stats_token(target), target)
+    return _build_stats_keyboard(rows)
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _build_stats_keyboard(rows: tuple[tuple[str, int], ...]) -> InlineKeyboardMarkup:
+    inline_keyboard = [_stats_target_row(index, target, total) for index, (target, total) in enumerate(rows, start=1)]
+    inline_keyboard.append(_STATS_FOOTER_ROW)
     return InlineKeyboardMarkup(inline_keyboard=inline_keyboard)
 
 
@@ -193,7 +347,56 @@ def is_admin(user_id: int, settings: Settings) -> bool:
     return user_id in settings.admin_ids
 
 
-def build_admin_keyboard(paused: bool) -> InlineKeyboardMarkup:
+def admin_only(handler: Callable[..., Awaitable[None]]) -> Callable[..., Awaitable[None]]:
+    # functools.wraps keeps the wrapped signature, which aiogram reads to decide which kwargs to inject.
+    @wraps(handler)
+    async def wrapper(callback: CallbackQuery, *args: Any, settings: Settings, **kwargs: Any) -> None:
+        user = callback.from_user
+        if not user or not is_admin(user.id, settings):
+            await callback.answer("Недостаточно прав", show_alert=True)
+            return
+        await handler(callback, *args, settings=settings, **kwargs)
+
+    return wrapper
+
+
+def _remember_render(message: Message, digest: bytes) -> None:
+    key = (message.chat.id, message.message_id)
+    last_render[key] = digest
+    last_render.move_to_end(key)
+    while len(last_render) > LAST_RENDER_CACHE_SIZE:
+        last_render.popitem(last=False)
+
+
+def _forget_render(message: Message) -> None:
+    last_render.pop((message.chat.id, message.message_id), None)
+
+
+async def _edit_or_send(message: Message, text: str, keyboard: Optional[InlineKeyboardMarkup]) -> None:
+    # Skip the round-trip when the panel already shows exactly this; Telegram would only reply "not modified".
+    digest = hashlib.blake2b((text + repr(keyboard)).encode("utf-8"), digest_size=16).digest()
+    if last_render.get((message.chat.id, message.message_id)) == digest:
+        return
+    try:
+        await message.edit_text(text, reply_markup=keyboard)
+    except TelegramBadRequest as exc:
+        if "message is not modified" not in exc.message:
+            _forget_render(message)
+            message = await message.answer(text, reply_markup=keyboard)
+    except Exception:
+        _forget_render(message)
+        message = await message.answer(text, reply_markup=keyboard)
+    _remember_render(message, digest)
+
+
+async def _edit_quietly(message: Message, text: str, keyboard: Optional[InlineKeyboardMarkup] = None) -> None:
+    try:
+        await message.edit_text(text, reply_markup=keyboard)
+    except Exception:
+        pass
+
+
+def _make_admin_keyboard(paused: bool) -> InlineKeyboardMarkup:
     pause_label = "▶️ Возобновить" if paused else "⏸ Пауза"
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -207,123 +410,141 @@ def build_admin_keyboard(paused: bool) -> InlineKeyboardMarkup:
         ]
     )
 
+
+# Static markups are built once at import; aiogram only serializes them when sending.
+_ADMIN_KB_PAUSED = _make_admin_keyboard(True)
+_ADMIN_KB_RUNNING = _make_admin_keyboard(False)
+
+_BACK_HOME_KB = InlineKeyboardMarkup(
+    inline_keyboard=[[InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home")]]
+)
+
+_ACCOUNT_KB = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="\u041d\u0430\u0441\u0442\u0440\u043e\u0439\u043a\u0430 API ID/Hash", callback_data="admin:accounts:api")],
+        [InlineKeyboardButton(text="\u0414\u043e\u0431\u0430\u0432\u0438\u0442\u044c \u0430\u043a\u043a\u0430\u0443\u043d\u0442", callback_data="admin:accounts:add")],
+        [InlineKeyboardButton(text="\u0421\u043f\u0438\u0441\u043e\u043a \u0430\u043a\u043a\u0430\u0443\u043d\u0442\u043e\u0432", callback_data="admin:accounts:list")],
+        [InlineKeyboardButton(text="\u041d\u0430\u0437\u0430\u0434", callback_data="admin:home")],
+    ]
+)
+
+_BROADCAST_SCOPE_KB = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="👥 Пользователям", callback_data="admin:broadcast:scope:users")],
+        [InlineKeyboardButton(text="💬 Группам", callback_data="admin:broadcast:scope:groups")],
+        [InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home")],
+    ]
+)
+
+_BROADCAST_BUTTON_CHOICE_KB = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="➕ Добавить кнопку", callback_data="admin:broadcast:add_button:yes")],
+        [InlineKeyboardButton(text="➡️ Отправить без кнопки", callback_data="admin:broadcast:add_button:no")],
+        [InlineKeyboardButton(text="❌ Отмена", callback_data="admin:broadcast:cancel")],
+    ]
+)
+
+_REPUTATION_KB = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="➕ Новая корректировка", callback_data="admin:reputation:new")],
+        [InlineKeyboardButton(text="📄 Последние корректировки", callback_data="admin:reputation:history")],
+        [InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home")],
+    ]
+)
+
+
+def build_admin_keyboard(paused: bool) -> InlineKeyboardMarkup:
+    return _ADMIN_KB_PAUSED if paused else _ADMIN_KB_RUNNING
+
+
 def build_account_keyboard() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text="\u041d\u0430\u0441\u0442\u0440\u043e\u0439\u043a\u0430 API ID/Hash", callback_data="admin:accounts:api")],
-            [InlineKeyboardButton(text="\u0414\u043e\u0431\u0430\u0432\u0438\u0442\u044c \u0430\u043a\u043a\u0430\u0443\u043d\u0442", callback_data="admin:accounts:add")],
-            [InlineKeyboardButton(text="\u0421\u043f\u0438\u0441\u043e\u043a \u0430\u043a\u043a\u0430\u0443\u043d\u0442\u043e\u0432", callback_data="admin:accounts:list")],
-            [InlineKeyboardButton(text="\u041d\u0430\u0437\u0430\u0434", callback_data="admin:home")],
-        ]
-    )
+    return _ACCOUNT_KB
 
 
+def build_users_keyboard(users: list[UserRecord]) -> InlineKeyboardMarkup:
+    return _build_users_keyboard(tuple(users))
 
-def build_users_keyboard(users: list[dict[str, object]]) -> InlineKeyboardMarkup:
-    keyboard: list[list[InlineKeyboardButton]] = []
-    for item in users:
-        user_id = item["user_id"]
-        blocked = bool(item["blocked"])
-        action = "unblock" if blocked else "block"
-        label = "Разблокировать" if blocked else "Заблокировать"
-        emoji = "✅" if blocked else "🚫"
-        keyboard.append(
-            [
-                InlineKeyboardButton(
-                    text=f"{emoji} {label} {user_id}",
-                    callback_data=f"admin:user:{action}:{user_id}",
-                )
-            ]
-        )
-    keyboard.append(
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _build_users_keyboard(users: tuple[UserRecord, ...]) -> InlineKeyboardMarkup:
+    keyboard = [
         [
-            InlineKeyboardButton(text="🔄 Обновить", callback_data="admin:users:refresh"),
-            InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home"),
+            InlineKeyboardButton(
+                text=f"{'✅ Разблокировать' if item.blocked else '🚫 Заблокировать'} {item.user_id}",
+                callback_data=f"admin:user:{'unblock' if item.blocked else 'block'}:{item.user_id}",
+            )
         ]
-    )
+        for item in users
+    ]
+    keyboard.append(_USERS_FOOTER_ROW)
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
-def build_groups_keyboard(groups: list[dict[str, object]]) -> InlineKeyboardMarkup:
-    keyboard: list[list[InlineKeyboardButton]] = []
-    for group in groups[:20]:
-        chat_id = group["chat_id"]
-        keyboard.append(
-            [
-                InlineKeyboardButton(
-                    text=f"❌ Удалить {chat_id}",
-                    callback_data=f"admin:group:drop:{chat_id}",
-                )
-            ]
-        )
-    keyboard.append(
-        [
-            InlineKeyboardButton(text="🔄 Обновить", callback_data="admin:groups:refresh"),
-            InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home"),
-        ]
-    )
+def build_groups_keyboard(groups: list[GroupRecord]) -> InlineKeyboardMarkup:
+    return _build_groups_keyboard(tuple(groups[:20]))
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _build_groups_keyboard(groups: tuple[GroupRecord, ...]) -> InlineKeyboardMarkup:
+    keyboard = [
+        [InlineKeyboardButton(text=f"❌ Удалить {group.chat_id}", callback_data=f"admin:group:drop:{group.chat_id}")]
+        for group in groups
+    ]
+    keyboard.append(_GROUPS_FOOTER_ROW)
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 
 def build_broadcast_scope_keyboard() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text="👥 Пользователям", callback_data="admin:broadcast:scope:users")],
-            [InlineKeyboardButton(text="💬 Группам", callback_data="admin:broadcast:scope:groups")],
-            [InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home")],
-        ]
-    )
+    return _BROADCAST_SCOPE_KB
 
 
 def build_broadcast_button_choice() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text="➕ Добавить кнопку", callback_data="admin:broadcast:add_button:yes")],
-            [InlineKeyboardButton(text="➡️ Отправить без кнопки", callback_data="admin:broadcast:add_button:no")],
-            [InlineKeyboardButton(text="❌ Отмена", callback_data="admin:broadcast:cancel")],
-        ]
-    )
+    return _BROADCAST_BUTTON_CHOICE_KB
+
+
+def format_users_list(users: list[UserRecord]) -> str:
+    return _format_users_list(tuple(users))
 
 
-def format_users_list(users: list[dict[str, object]]) -> str:
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _format_users_list(users: tuple[UserRecord, ...]) -> str:
     if not users:
         return "Пока нет пользователей."
-    lines = ["👥 <b>ТОП пользователей</b>"]
-    for item in users:
-        username = f"@{escape_html(item['username'])}" if item['username'] else "—"
-        status = "🚫" if item['blocked'] else "✅"
-        lines.append(
-            f"{status} {username} — {item['request_count']} запросов (ID: <code>{item['user_id']}</code>)"
-        )
-    lines.append("\nИспользуйте кнопки ниже, чтобы ограничить или вернуть доступ.")
-    return "\n".join(lines)
+    rows = "\n".join(
+        f"{'🚫' if item.blocked else '✅'} {f'@{_escape_name(item.username)}' if item.username else '—'}"
+        f" — {item.request_count} запросов (ID: <code>{item.user_id}</code>)"
+        for item in users
+    )
+    return (
+        f"👥 <b>ТОП пользователей</b>\n{rows}\n"
+        "\nИспользуйте кнопки ниже, чтобы ограничить или вернуть доступ."
+    )
+
 
+def format_groups_list(groups: list[GroupRecord]) -> str:
+    return _format_groups_list(tuple(groups[:20]))
 
-def format_groups_list(groups: list[dict[str, object]]) -> str:
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _format_groups_list(groups: tuple[GroupRecord, ...]) -> str:
     if not groups:
         return "Групп пока нет. Добавьте бота и используйте /id, чтобы получить идентификатор."
-    lines = ["💬 <b>Группы</b>"]
-    for chat in groups[:20]:
-        status = "✅" if chat["is_active"] else "⏸"
-        title = escape_html(chat["title"] or "Без названия")
-        lines.append(f"{status} {title} — ID: <code>{chat['chat_id']}</code>")
-    lines.append("\nВыберите группу ниже, чтобы перевести её в архив.")
-    return "\n".join(lines)
+    rows = "\n".join(
+        f"{'✅' if chat.is_active else '⏸'} {_escape_name(chat.title or 'Без названия')}"
+        f" — ID: <code>{chat.chat_id}</code>"
+        for chat in groups
+    )
+    return f"💬 <b>Группы</b>\n{rows}\n\nВыберите группу ниже, чтобы перевести её в архив."
+
 
 async def format_account_list(db: Database) -> str:
     accounts = await db.list_pyrogram_accounts()
     if not accounts:
         return 'Аккаунты не настроены.'
-    rows = ['Сохранённые аккаунты:']
-    for item in accounts:
-        status = 'активен' if item['is_active'] else 'отключён'
-        phone = item['phone_number'] or '\u2014'
-        rows.append(f"\u2022 {phone} — {status}")
-    rows.append("")
-    rows.append('Новые аккаунты потребуют действительный API ID/Hash и вход через код.')
-    return '\n'.join(rows)
-
-
+    rows = "\n".join(
+        f"• {item['phone_number'] or '—'} — {'активен' if item['is_active'] else 'отключён'}" for item in accounts
+    )
+    return f"Сохранённые аккаунты:\n{rows}\n\nНовые аккаунты потребуют действительный API ID/Hash и вход через код."
 
 
 @router.message(Command("admin"))
@@ -335,138 +556,123 @@ async def admin_panel(message: Message, settings: Settings, db: Database) -> Non
     await message.answer("Панель администратора:", reply_markup=keyboard)
 
 
-@router.callback_query(F.data.startswith("admin:"))
-async def admin_actions(
-    callback: CallbackQuery,
-    settings: Settings,
-    db: Database,
-    account_pool: PyrogramAccountPool,
-) -> None:
-    user = callback.from_user
-    if not user or not is_admin(user.id, settings):
-        await callback.answer("Недостаточно прав", show_alert=True)
-        return
+async def _action_home(callback: CallbackQuery, user_id: int, db: Database) -> None:
+    paused = await db.is_paused()
+    keyboard = build_admin_keyboard(paused)
+    await _edit_or_send(callback.message, "Панель администратора:", keyboard)
+    await callback.answer()
 
-    raw_data = callback.data or ""
-    parts = raw_data.split(":")
-    if len(parts) < 2:
-        raise SkipHandler
-    action = parts[1]
-    extra = parts[2:]
-    if action == "home":
-        paused = await db.is_paused()
-        keyboard = build_admin_keyboard(paused)
-        await callback.message.edit_text("Панель администратора:", reply_markup=keyboard)
-        await callback.answer()
-        return
 
-    if action == "stats":
-        stats = await db.fetch_enhanced_statistics()
-        text = format_enhanced_statistics(stats)
-        keyboard = build_stats_keyboard(stats["top_targets"])
-        await callback.message.answer(
-            text,
-            parse_mode="HTML",
-            reply_markup=keyboard,
-            disable_web_page_preview=True,
-        )
-        await callback.answer()
-        return
+async def _action_stats(callback: CallbackQuery, user_id: int, db: Database) -> None:
+    stats = await _cached_read("stats", db.fetch_enhanced_statistics)
+    text = format_enhanced_statistics(stats)
+    keyboard = build_stats_keyboard(stats["top_targets"])
+    await callback.message.answer(
+        text,
+        reply_markup=keyboard,
+    )
+    await callback.answer()
 
-    if action == "users":
-        users = await db.top_users()
-        text = format_users_list(users)
-        keyboard = build_users_keyboard(users) if users else InlineKeyboardMarkup(
-            inline_keyboard=[[InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home")]]
-        )
-        await callback.message.answer(text, reply_markup=keyboard)
-        await callback.answer()
-        return
 
-    if action == "pause":
-        current = await db.is_paused()
-        await db.toggle_pause(not current)
-        new_keyboard = build_admin_keyboard(not current)
-        try:
-            await callback.message.edit_reply_markup(new_keyboard)
-        except Exception:
-            await callback.message.answer("Панель обновлена.", reply_markup=new_keyboard)
-        await callback.answer("Состояние обновлено")
-        return
+async def _action_users(callback: CallbackQuery, user_id: int, db: Database) -> None:
+    users = await _cached_read("users", db.top_users)
+    text = format_users_list(users)
+    keyboard = build_users_keyboard(users) if users else _BACK_HOME_KB
+    await callback.message.answer(text, reply_markup=keyboard)
+    await callback.answer()
 
-    if action == "reputation":
-        text = (
-            "⭐ <b>Управление репутацией</b>\n"
-            "Нажмите кнопку ниже, чтобы добавить ручную корректировку или посмотреть последние действия."
-        )
-        keyboard = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [InlineKeyboardButton(text="➕ Новая корректировка", callback_data="admin:reputation:new")],
-                [InlineKeyboardButton(text="📄 Последние корректировки", callback_data="admin:reputation:history")],
-                [InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home")],
-            ]
-        )
-        await callback.message.answer(text, reply_markup=keyboard)
-        await callback.answer()
-        return
 
-    if action == "accounts":
-        if not extra:
-            text = await format_account_list(db)
-            keyboard = build_account_keyboard()
-            await callback.message.answer(text, reply_markup=keyboard)
-            await callback.answer()
-            return
-        sub_action = extra[0]
-        if sub_action == "api":
-            prompt = await callback.message.answer("Введите API ID и API Hash через пробел")
-            pending_api[user.id] = PendingApiConfig(stage="await_credentials", prompt_message_id=prompt.message_id)
-            await callback.answer("Ожидаю данные")
-            return
-        if sub_action == "code":
-            raise SkipHandler
-        if sub_action == "add":
-            api_id = await db.get_setting("pyrogram_api_id")
-            api_hash = await db.get_setting("pyrogram_api_hash")
-            if not api_id or not api_hash:
-                await callback.answer("Сначала настройте API ID/Hash через меню", show_alert=True)
-                return
+async def _action_pause(callback: CallbackQuery, user_id: int, db: Database) -> None:
+    current = await db.is_paused()
+    await db.toggle_pause(not current)
+    new_keyboard = build_admin_keyboard(not current)
+    _forget_render(callback.message)
+    try:
+        await callback.message.edit_reply_markup(new_keyboard)
+    except Exception:
+        await callback.message.answer("Панель обновлена.", reply_markup=new_keyboard)
+    await callback.answer("Состояние обновлено")
 
-            prompt = await callback.message.answer("Отправьте номер телефона в формате +71234567890")
-            pending_accounts[user.id] = PendingAccount(stage="await_phone", prompt_message_id=prompt.message_id)
-            await callback.answer("Ожидаю номер")
-            return
-        if sub_action == "list":
-            text = await format_account_list(db)
-            keyboard = build_account_keyboard()
-            await callback.message.answer(text, reply_markup=keyboard)
-            await callback.answer()
-            return
-        await callback.answer()
-        return
-    if action == "broadcast":
-        text = (
-            "📣 <b>Рассылка</b>\n"
-            "Выберите получателей. После выбора бот попросит отправить сообщение для рассылки."
-        )
-        await callback.message.answer(text, reply_markup=build_broadcast_scope_keyboard())
-        await callback.answer()
-        return
 
-    if action == "groups":
-        groups = await db.list_groups()
-        text = format_groups_list(groups)
-        keyboard = build_groups_keyboard(groups) if groups else InlineKeyboardMarkup(
-            inline_keyboard=[[InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home")]]
-        )
-        await callback.message.answer(text, reply_markup=keyboard)
-        await callback.answer()
+async def _action_reputation(callback: CallbackQuery, user_id: int, db: Database) -> None:
+    text = (
+        "⭐ <b>Управление репутацией</b>\n"
+        "Нажмите кнопку ниже, чтобы добавить ручную корректировку или посмотреть последние действия."
+    )
+    await callback.message.answer(text, reply_markup=_REPUTATION_KB)
+    await callback.answer()
+
+
+async def _action_accounts_list(callback: CallbackQuery, user_id: int, db: Database) -> None:
+    text = await format_account_list(db)
+    keyboard = build_account_keyboard()
+    await callback.message.answer(text, reply_markup=keyboard)
+    await callback.answer()
+
+
+async def _action_accounts_api(callback: CallbackQuery, user_id: int, db: Database) -> None:
+    prompt = await callback.message.answer("Введите API ID и API Hash через пробел")
+    await _start_pending(user_id, PendingApiConfig(stage="await_credentials", prompt_message_id=prompt.message_id))
+    await callback.answer("Ожидаю данные")
+
+
+async def _action_accounts_add(callback: CallbackQuery, user_id: int, db: Database) -> None:
+    credentials = await db.get_settings("pyrogram_api_id", "pyrogram_api_hash")
+    api_id, api_hash = credentials["pyrogram_api_id"], credentials["pyrogram_api_hash"]
+    if not api_id or not api_hash:
+        await callback.answer("Сначала настройте API ID/Hash через меню", show_alert=True)
         return
 
+    prompt = await callback.message.answer("Отправьте номер телефона в формате +71234567890")
+    await _start_pending(user_id, PendingAccount(stage="await_phone", prompt_message_id=prompt.message_id))
+    await callback.answer("Ожидаю номер")
+
+
+async def _action_broadcast(callback: CallbackQuery, user_id: int, db: Database) -> None:
+    text = (
+        "📣 <b>Рассылка</b>\n"
+        "Выберите получателей. После выбора бот попросит отправить сообщение для рассылки."
+    )
+    await callback.message.answer(text, reply_markup=build_broadcast_scope_keyboard())
+    await callback.answer()
+
+
+async def _action_groups(callback: CallbackQuery, user_id: int, db: Database) -> None:
+    groups = await _cached_read("groups", db.list_groups)
+    text = format_groups_list(groups)
+    keyboard = build_groups_keyboard(groups) if groups else _BACK_HOME_KB
+    await callback.message.answer(text, reply_markup=keyboard)
     await callback.answer()
 
 
+_ADMIN_ACTIONS: Dict[str, Callable[[CallbackQuery, int, Database], Awaitable[None]]] = {
+    "home": _action_home,
+    "stats": _action_stats,
+    "users": _action_users,
+    "pause": _action_pause,
+    "reputation": _action_reputation,
+    "accounts": _action_accounts_list,
+    "accounts:list": _action_accounts_list,
+    "accounts:api": _action_accounts_api,
+    "accounts:add": _action_accounts_add,
+    "broadcast": _action_broadcast,
+    "groups": _action_groups,
+}
+
+
+@router.callback_query(F.data.startswith("admin:"))
+@admin_only
+async def admin_actions(callback: CallbackQuery, settings: Settings, db: Database) -> None:
+    _, _, action = (callback.data or "").partition(":")
+    handler = _ADMIN_ACTIONS.get(action)
+    if handler is None:
+        # Nested callbacks (admin:stats:refresh, admin:user:…, admin:accounts:code:…) have dedicated handlers below.
+        raise SkipHandler
+    await handler(callback, callback.from_user.id, db)
+
+
 @router.callback_query(F.data.startswith("admin:accounts:code:"))
+@admin_only
 async def handle_account_code_inputs(
     callback: CallbackQuery,
     settings: Settings,
@@ -474,16 +680,14 @@ async def handle_account_code_inputs(
     account_pool: PyrogramAccountPool,
 ) -> None:
     user = callback.from_user
-    if not user or not is_admin(user.id, settings):
-        await callback.answer("Недостаточно прав", show_alert=True)
-        return
     message = callback.message
     if not message:
         await callback.answer()
         return
 
-    state = pending_accounts.get(user.id)
-    if not state or state.stage != "await_code":
+    await _expire_pending(user.id)
+    state = pending.get(user.id)
+    if not isinstance(state, PendingAccount) or state.stage != "await_code":
         await callback.answer("Запрос неактуален", show_alert=True)
         return
 
@@ -501,36 +705,19 @@ async def handle_account_code_inputs(
             await callback.answer("Код не может быть длиннее 6 цифр.", show_alert=True)
             return
         state.code_buffer += digit
-        try:
-            await message.edit_text(
-                _code_prompt_text(state.code_buffer),
-                reply_markup=_build_code_input_keyboard(state.code_buffer),
-                parse_mode="HTML",
-            )
-        except Exception:
-            pass
+        await _edit_quietly(message, _code_prompt_text(state.code_buffer), _CODE_INPUT_KB)
         await callback.answer()
         return
 
     if action == "back":
         state.code_buffer = state.code_buffer[:-1]
-        try:
-            await message.edit_text(
-                _code_prompt_text(state.code_buffer),
-                reply_markup=_build_code_input_keyboard(state.code_buffer),
-                parse_mode="HTML",
-            )
-        except Exception:
-            pass
+        await _edit_quietly(message, _code_prompt_text(state.code_buffer), _CODE_INPUT_KB)
         await callback.answer()
         return
 
     if action == "cancel":
         await _reset_pending_account(user.id)
-        try:
-            await message.edit_text("Ввод кода отменён.", reply_markup=None)
-        except Exception:
-            pass
+        await _edit_quietly(message, "Ввод кода отменён.")
         await callback.answer("Отменено")
         return
 
@@ -543,10 +730,7 @@ async def handle_account_code_inputs(
         if client is None:
             await callback.message.answer("Session lost. Start over.")
             await _reset_pending_account(user.id)
-            try:
-                await message.edit_text("Сессия недоступна.", reply_markup=None)
-            except Exception:
-                pass
+            await _edit_quietly(message, "Сессия недоступна.")
             await callback.answer()
             return
         try:
@@ -557,100 +741,57 @@ async def handle_account_code_inputs(
                 code,
                 phone_code_hash=state.phone_code_hash,
             )
-        except errors.FloodWait as exc:
-            await callback.message.answer(f"Too many attempts. Try again in {exc.value} seconds.")
+        except FloodWait as exc:
+            await callback.message.answer(_FLOOD_WAIT_TEXT.format(exc.value))
             await callback.answer()
             return
-        except errors.SessionPasswordNeeded:
+        except SessionPasswordNeeded:
             state.stage = "await_password"
             state.code_buffer = ""
-            try:
-                await message.edit_text(
-                    _code_prompt_text(state.code_buffer),
-                    reply_markup=None,
-                    parse_mode="HTML",
-                )
-            except Exception:
-                pass
+            await _edit_quietly(message, _code_prompt_text(state.code_buffer))
             await callback.message.answer("This account has a password. Send the password now.")
             await callback.answer()
             return
-        except errors.PhoneCodeInvalid:
+        except PhoneCodeInvalid:
             state.code_buffer = ""
-            try:
-                await message.edit_text(
-                    _code_prompt_text(state.code_buffer),
-                    reply_markup=_build_code_input_keyboard(state.code_buffer),
-                    parse_mode="HTML",
-                )
-            except Exception:
-                pass
+            await _edit_quietly(message, _code_prompt_text(state.code_buffer), _CODE_INPUT_KB)
             await callback.message.answer("Invalid code. Try again.")
             await callback.answer()
             return
         except Exception:
             await callback.message.answer("Sign-in failed. Try again later.")
             await _reset_pending_account(user.id)
-            try:
-                await message.edit_text("Ошибка авторизации.", reply_markup=None)
-            except Exception:
-                pass
+            await _edit_quietly(message, "Ошибка авторизации.")
             await callback.answer()
             return
-        await client.disconnect()
-        session_name = state.session_name or f"account_{int(time.time())}"
-        phone_number = state.phone_number
-        pending_accounts.pop(user.id, None)
-        await db.add_pyrogram_account(session_name, phone_number)
-        await account_pool.refresh()
-        try:
-            await message.edit_text("Код принят.", reply_markup=None)
-        except Exception:
-            pass
-        await callback.message.answer("Account added.")
-        await callback.answer("Готово")
+        await _edit_quietly(message, "Код принят.")
+        await asyncio.gather(
+            _complete_account_login(user.id, state, client, db, account_pool),
+            callback.message.answer("Account added."),
+            callback.answer("Готово"),
+        )
         return
 
     await callback.answer()
 
 @router.callback_query(F.data == "admin:stats:refresh")
+@admin_only
 async def refresh_stats(callback: CallbackQuery, settings: Settings, db: Database) -> None:
-    user = callback.from_user
-    if not user or not is_admin(user.id, settings):
-        await callback.answer("Недостаточно прав", show_alert=True)
-        return
-    stats = await db.fetch_enhanced_statistics()
+    stats = await _cached_read("stats", db.fetch_enhanced_statistics)
     text = format_enhanced_statistics(stats)
     keyboard = build_stats_keyboard(stats["top_targets"])
-    try:
-        await callback.message.edit_text(
-            text,
-            parse_mode="HTML",
-            reply_markup=keyboard,
-            disable_web_page_preview=True,
-        )
-    except Exception:
-        await callback.message.answer(
-            text,
-            parse_mode="HTML",
-            reply_markup=keyboard,
-            disable_web_page_preview=True,
-        )
+    await _edit_or_send(callback.message, text, keyboard)
     await callback.answer("Обновлено")
 
 
 @router.callback_query(F.data.startswith("admin:stats:target:"))
+@admin_only
 async def show_stats_target(callback: CallbackQuery, settings: Settings, db: Database) -> None:
-    user = callback.from_user
-    if not user or not is_admin(user.id, settings):
-        await callback.answer("Недостаточно прав", show_alert=True)
-        return
-    parts = (callback.data or "").split(":")
-    if len(parts) != 4:
+    match = _STATS_TARGET_CALLBACK.fullmatch(callback.data or "")
+    if match is None:
         await callback.answer("Некорректный запрос", show_alert=True)
         return
-    token = parts[3]
-    target = stats_target_cache.get(token)
+    target = _lookup_stats_target(match[1])
     if not target:
         await callback.answer("Данные устарели. Нажмите «Обновить».", show_alert=True)
         return
@@ -659,143 +800,93 @@ async def show_stats_target(callback: CallbackQuery, settings: Settings, db: Dat
     keyboard = build_detail_keyboard(summary.target, summary.chat_id)
     await callback.message.answer(
         text,
-        parse_mode="HTML",
         reply_markup=keyboard,
-        disable_web_page_preview=True,
     )
     await callback.answer("Готово")
 
 
 @router.callback_query(F.data.startswith("admin:user:"))
+@admin_only
 async def handle_user_actions(callback: CallbackQuery, settings: Settings, db: Database) -> None:
-    user = callback.from_user
-    if not user or not is_admin(user.id, settings):
-        await callback.answer("Недостаточно прав", show_alert=True)
-        return
-    parts = (callback.data or "").split(":")
-    if len(parts) != 4:
-        await callback.answer()
-        return
-    action, target_id = parts[2], parts[3]
-    if not target_id.isdigit():
-        await callback.answer("Некорректный идентификатор", show_alert=True)
+    match = _USER_ACTION_CALLBACK.fullmatch(callback.data or "")
+    if match is None:
+        await callback.answer("Некорректный запрос", show_alert=True)
         return
-    target_user_id = int(target_id)
-    if action == "block":
-        await db.set_user_blocked(target_user_id, True)
-        await callback.answer("Пользователь заблокирован")
-    elif action == "unblock":
-        await db.set_user_blocked(target_user_id, False)
-        await callback.answer("Доступ возвращён")
-    else:
-        await callback.answer()
+    blocked = match[1] == "block"
+    if not await db.set_user_blocked(int(match[2]), blocked):
+        await callback.answer("Пользователь не найден", show_alert=True)
         return
-    users = await db.top_users()
+    await callback.answer("Пользователь заблокирован" if blocked else "Доступ возвращён")
+    _invalidate_reads("users", "stats")
+    users = await _cached_read("users", db.top_users)
     text = format_users_list(users)
-    keyboard = build_users_keyboard(users) if users else InlineKeyboardMarkup(
-        inline_keyboard=[[InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home")]]
-    )
-    try:
-        await callback.message.edit_text(text, reply_markup=keyboard)
-    except Exception:
-        await callback.message.answer(text, reply_markup=keyboard)
+    keyboard = build_users_keyboard(users) if users else _BACK_HOME_KB
+    await _edit_or_send(callback.message, text, keyboard)
 
 
 @router.callback_query(F.data == "admin:users:refresh")
+@admin_only
 async def refresh_users(callback: CallbackQuery, settings: Settings, db: Database) -> None:
-    user = callback.from_user
-    if not user or not is_admin(user.id, settings):
-        await callback.answer("Недостаточно прав", show_alert=True)
-        return
-    users = await db.top_users()
+    users = await _cached_read("users", db.top_users)
     text = format_users_list(users)
-    keyboard = build_users_keyboard(users) if users else InlineKeyboardMarkup(
-        inline_keyboard=[[InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home")]]
-    )
-    await callback.message.edit_text(text, reply_markup=keyboard)
+    keyboard = build_users_keyboard(users) if users else _BACK_HOME_KB
+    await _edit_or_send(callback.message, text, keyboard)
     await callback.answer("Обновлено")
 
 
 @router.callback_query(F.data.startswith("admin:group:"))
+@admin_only
 async def handle_group_actions(callback: CallbackQuery, settings: Settings, db: Database) -> None:
-    user = callback.from_user
-    if not user or not is_admin(user.id, settings):
-        await callback.answer("Недостаточно прав", show_alert=True)
-        return
-    parts = (callback.data or "").split(":")
-    if len(parts) != 4:
-        await callback.answer()
-        return
-    action, chat_id_raw = parts[2], parts[3]
-    if not chat_id_raw.lstrip("-+").isdigit():
-        await callback.answer("Некорректный идентификатор", show_alert=True)
-        return
-    chat_id = int(chat_id_raw)
-    if action == "drop":
-        await db.deactivate_group(chat_id)
-        await callback.answer("Группа переведена в архив")
-    else:
-        await callback.answer()
+    match = _GROUP_ACTION_CALLBACK.fullmatch(callback.data or "")
+    if match is None:
+        await callback.answer("Некорректный запрос", show_alert=True)
         return
-    groups = await db.list_groups()
+    await db.deactivate_group(int(match[1]))
+    await callback.answer("Группа переведена в архив")
+    _invalidate_reads("groups", "stats")
+    groups = await _cached_read("groups", db.list_groups)
     text = format_groups_list(groups)
-    keyboard = build_groups_keyboard(groups) if groups else InlineKeyboardMarkup(
-        inline_keyboard=[[InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home")]]
-    )
-    try:
-        await callback.message.edit_text(text, reply_markup=keyboard)
-    except Exception:
-        await callback.message.answer(text, reply_markup=keyboard)
+    keyboard = build_groups_keyboard(groups) if groups else _BACK_HOME_KB
+    await _edit_or_send(callback.message, text, keyboard)
 
 
 @router.callback_query(F.data == "admin:groups:refresh")
+@admin_only
 async def refresh_groups(callback: CallbackQuery, settings: Settings, db: Database) -> None:
-    user = callback.from_user
-    if not user or not is_admin(user.id, settings):
-        await callback.answer("Недостаточно прав", show_alert=True)
-        return
-    groups = await db.list_groups()
+    groups = await _cached_read("groups", db.list_groups)
     text = format_groups_list(groups)
-    keyboard = build_groups_keyboard(groups) if groups else InlineKeyboardMarkup(
-        inline_keyboard=[[InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:home")]]
-    )
-    await callback.message.edit_text(text, reply_markup=keyboard)
+    keyboard = build_groups_keyboard(groups) if groups else _BACK_HOME_KB
+    await _edit_or_send(callback.message, text, keyboard)
     await callback.answer("Обновлено")
 
 
 @router.callback_query(F.data == "admin:reputation:new")
+@admin_only
 async def request_manual_adjustment(callback: CallbackQuery, settings: Settings) -> None:
     user = callback.from_user
-    if not user or not is_admin(user.id, settings):
-        await callback.answer("Недостаточно прав", show_alert=True)
-        return
     prompt = await callback.message.answer(
         "Введите данные для корректировки в формате: <code>username +10 -3 [chat_id]</code>",
-        parse_mode="HTML",
     )
-    pending_reputation[user.id] = PendingReputation(stage="await_data", prompt_message_id=prompt.message_id)
+    await _start_pending(user.id, PendingReputation(stage="await_data", prompt_message_id=prompt.message_id))
     await callback.answer("Ожидаю данные")
 
 
 @router.callback_query(F.data == "admin:reputation:history")
+@admin_only
 async def show_manual_adjustments(callback: CallbackQuery, settings: Settings, db: Database) -> None:
-    user = callback.from_user
-    if not user or not is_admin(user.id, settings):
-        await callback.answer("Недостаточно прав", show_alert=True)
-        return
     adjustments = await db.recent_manual_adjustments()
     if not adjustments:
         text = "Пока нет ручных корректировок."
     else:
         lines = ["📄 <b>Последние корректировки</b>"]
         for item in adjustments:
-            username = item["target"]
-            pos = item["positive_delta"]
-            neg = item["negative_delta"]
-            chat = item.get("chat_id")
-            creator = item.get("created_by")
-            created_at = item.get("created_at")
-            parts = [f"👤 <code>{escape_html(username)}</code>"]
+            username = item.target
+            pos = item.positive_delta
+            neg = item.negative_delta
+            chat = item.chat_id
+            creator = item.created_by
+            created_at = item.created_at
+            parts = [f"👤 <code>{_escape_name(username)}</code>"]
             if chat:
                 parts.append(f"в чате <code>{chat}</code>")
             parts.append(f"+{pos} / -{neg}")
@@ -805,16 +896,14 @@ async def show_manual_adjustments(callback: CallbackQuery, settings: Settings, d
                 parts.append(created_at)
             lines.append(" ".join(parts))
         text = "\n".join(lines)
-    await callback.message.answer(text, parse_mode="HTML")
+    await callback.message.answer(text)
     await callback.answer()
 
 
 @router.callback_query(F.data.startswith("admin:broadcast:scope:"))
+@admin_only
 async def choose_broadcast_scope(callback: CallbackQuery, settings: Settings) -> None:
     user = callback.from_user
-    if not user or not is_admin(user.id, settings):
-        await callback.answer("Недостаточно прав", show_alert=True)
-        return
     scope = (callback.data or "").split(":")[-1]
     if scope not in {"groups", "users"}:
         await callback.answer()
@@ -822,54 +911,73 @@ async def choose_broadcast_scope(callback: CallbackQuery, settings: Settings) ->
     prompt = await callback.message.answer(
         "Отправьте сообщение, которое нужно разослать. Оно может содержать текст, фото или другие вложения.",
     )
-    pending_broadcast[user.id] = PendingBroadcast(
-        scope=scope,
-        stage="await_content",
-        prompt_message_id=prompt.message_id,
+    await _start_pending(
+        user.id,
+        PendingBroadcast(scope=scope, stage="await_content", prompt_message_id=prompt.message_id),
     )
     await callback.answer("Жду сообщение")
 
 
 @router.callback_query(F.data.startswith("admin:broadcast:add_button:"))
+@admin_only
 async def broadcast_button_choice(callback: CallbackQuery, settings: Settings, bot: Bot, db: Database) -> None:
     user = callback.from_user
-    if not user or not is_admin(user.id, settings):
-        await callback.answer("Недостаточно прав", show_alert=True)
-        return
-    state = pending_broadcast.get(user.id)
-    if not state:
+    state = pending.get(user.id)
+    if not isinstance(state, PendingBroadcast):
         await callback.answer("Нет активной рассылки", show_alert=True)
         return
     choice = (callback.data or "").split(":")[-1]
     if choice == "yes":
-        state.stage = "await_button_text"
-        prompt = await callback.message.answer("Введите текст кнопки")
+        state.stage = "await_button"
+        prompt = await callback.message.answer("Отправьте текст кнопки и ссылку на двух отдельных строках")
         state.prompt_message_id = prompt.message_id
-        await callback.answer("Жду текст кнопки")
+        await callback.answer("Жду кнопку")
         return
     if choice == "no":
-        await perform_broadcast(callback.message, bot, db, user.id, state)
-        await callback.answer("Рассылка отправлена")
+        # End the dialog first so a repeated button press cannot send the same broadcast twice.
+        _finish_pending(user.id, state)
+        start_broadcast(callback.message, bot, db, state)
+        await callback.answer("Рассылка запущена")
         return
     await callback.answer()
 
 
 @router.callback_query(F.data == "admin:broadcast:cancel")
+@admin_only
 async def cancel_broadcast(callback: CallbackQuery, settings: Settings) -> None:
     user = callback.from_user
-    if not user or not is_admin(user.id, settings):
-        await callback.answer("Недостаточно прав", show_alert=True)
-        return
-    if user.id in pending_broadcast:
-        pending_broadcast.pop(user.id)
+    state = pending.get(user.id)
+    if isinstance(state, PendingBroadcast):
+        _finish_pending(user.id, state)
     await callback.answer("Рассылка отменена")
     await callback.message.answer("Рассылка отменена.")
 
 
-async def perform_broadcast(message: Message, bot: Bot, db: Database, admin_id: int, state: PendingBroadcast) -> None:
+async def _copy_broadcast(
+    bot: Bot,
+    target: int,
+    state: PendingBroadcast,
+    markup: Optional[InlineKeyboardMarkup],
+) -> bool:
+    for attempt in range(BROADCAST_RETRIES):
+        try:
+            await bot.copy_message(
+                chat_id=target,
+                from_chat_id=state.content_chat_id,
+                message_id=state.content_message_id,
+                reply_markup=markup,
+            )
+            return True
+        except TelegramRetryAfter as exc:
+            await asyncio.sleep(exc.retry_after * 2**attempt)
+        except Exception:
+            return False
+    return False
+
+
+async def perform_broadcast(message: Message, bot: Bot, db: Database, state: PendingBroadcast) -> None:
     if state.content_chat_id is None or state.content_message_id is None:
         await message.answer("Нет сообщения для рассылки.")
-        pending_broadcast.pop(admin_id, None)
         return
     if state.scope == "groups":
         targets = await db.active_group_ids()
@@ -880,23 +988,54 @@ async def perform_broadcast(message: Message, bot: Bot, db: Database, admin_id:
         markup = InlineKeyboardMarkup(
             inline_keyboard=[[InlineKeyboardButton(text=state.button_text, url=state.button_url)]]
         )
+    loop = asyncio.get_running_loop()
+    remaining = iter(targets)
+    next_start = loop.time()
     sent = 0
-    for target in targets:
-        try:
-            await bot.copy_message(
-                chat_id=target,
-                from_chat_id=state.content_chat_id,
-                message_id=state.content_message_id,
-                reply_markup=markup,
-            )
-            sent += 1
-        except Exception:
-            continue
-    pending_broadcast.pop(admin_id, None)
+
+    async def worker() -> None:
+        nonlocal next_start, sent
+        # Workers share one iterator, so each target is taken exactly once without a task per recipient.
+        for target in remaining:
+            now = loop.time()
+            delay = next_start - now
+            next_start = max(now, next_start) + 1 / BROADCAST_RATE
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if await _copy_broadcast(bot, target, state, markup):
+                sent += 1
+
+    await asyncio.gather(*(worker() for _ in range(min(BROADCAST_CONCURRENCY, len(targets)))))
     await message.answer(f"Рассылка отправлена {sent} получателям.")
 
 
-@router.message()
+def _broadcast_done(task: asyncio.Task[None]) -> None:
+    broadcast_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Broadcast failed", exc_info=task.exception())
+
+
+def start_broadcast(message: Message, bot: Bot, db: Database, state: PendingBroadcast) -> None:
+    task = asyncio.create_task(perform_broadcast(message, bot, db, state))
+    broadcast_tasks.add(task)
+    task.add_done_callback(_broadcast_done)
+
+
+async def cancel_broadcasts() -> None:
+    """Stop broadcasts that are still sending; call before the database is closed."""
+    tasks = list(broadcast_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def has_pending_dialog(message: Message, settings: Settings) -> bool:
+    # Only admins can open a dialog, but keep the handler admin-only on its own terms as well.
+    user = message.from_user
+    return user is not None and user.id in pending and is_admin(user.id, settings)
+
+
+@router.message(has_pending_dialog)
 async def handle_admin_inputs(
     message: Message,
     settings: Settings,
@@ -904,157 +1043,138 @@ async def handle_admin_inputs(
     bot: Bot,
     account_pool: PyrogramAccountPool,
 ) -> None:
-    if not message.from_user or not is_admin(message.from_user.id, settings):
-        raise SkipHandler
     user_id = message.from_user.id
+    await _expire_pending(user_id)
 
-    api_state = pending_api.get(user_id)
-    if api_state and api_state.stage == "await_credentials":
-        tokens = shlex.split(message.text or "")
+    state = pending.get(user_id)
+    text = message.text or ""
+    if isinstance(state, PendingApiConfig) and state.stage == "await_credentials":
+        tokens = text.split()
         if len(tokens) < 2:
             await message.reply("Please send API ID and API Hash separated by space.")
             return
-        try:
-            api_id = int(tokens[0])
-        except ValueError:
+        api_id = _parse_int(tokens[0])
+        if api_id is None:
             await message.reply("API ID must be a number.")
             return
         api_hash = tokens[1]
-        await db.set_setting("pyrogram_api_id", str(api_id))
-        await db.set_setting("pyrogram_api_hash", api_hash)
-        pending_api.pop(user_id, None)
+        async with db.transaction():
+            await db.set_setting("pyrogram_api_id", str(api_id))
+            await db.set_setting("pyrogram_api_hash", api_hash)
+        _finish_pending(user_id, state)
         await account_pool.configure(api_id, api_hash)
         await message.reply("API credentials saved.")
         return
 
-    account_state = pending_accounts.get(user_id)
-    if account_state:
-        if account_state.stage == "await_phone":
-            phone = (message.text or "").strip()
+    if isinstance(state, PendingAccount):
+        if state.stage == "await_phone":
+            phone = text.strip()
             if not phone:
                 await message.reply("Please send a phone number in international format, e.g. +1234567890.")
                 return
-            api_id_raw = await db.get_setting("pyrogram_api_id")
-            api_hash = await db.get_setting("pyrogram_api_hash")
+            credentials = await db.get_settings("pyrogram_api_id", "pyrogram_api_hash")
+            api_id_raw, api_hash = credentials["pyrogram_api_id"], credentials["pyrogram_api_hash"]
             if not api_id_raw or not api_hash:
-                await message.reply("Configure API ID / Hash first.")
-                await _reset_pending_account(user_id)
+                await _fail_account_login(message, user_id, "Configure API ID / Hash first.")
                 return
-            try:
-                api_id = int(api_id_raw)
-            except ValueError:
-                await message.reply("Stored API ID is invalid. Configure it again.")
-                await _reset_pending_account(user_id)
+            api_id = _parse_int(api_id_raw)
+            if api_id is None:
+                await _fail_account_login(message, user_id, "Stored API ID is invalid. Configure it again.")
                 return
-            clean_phone = "".join(ch for ch in phone if ch.isdigit())
+            clean_phone = _NON_DIGITS.sub("", phone)
             if not clean_phone:
                 await message.reply("Phone number must contain digits.")
                 return
-            session_dir = Path("data") / "pyrogram_sessions"
-            session_dir.mkdir(parents=True, exist_ok=True)
-            session_name = f"account_{clean_phone}_{int(time.time())}"
+            session_name = f"account_{clean_phone}_{next(_SESSION_IDS)}"
             client = Client(
                 name=session_name,
                 api_id=api_id,
                 api_hash=api_hash,
-                workdir=str(session_dir.resolve()),
+                workdir=account_pool.workdir,
                 no_updates=True,
             )
             try:
                 await client.connect()
                 sent = await client.send_code(phone)
-            except errors.FloodWait as exc:
-                await message.reply(f"Too many attempts. Try again in {exc.value} seconds.")
-                await client.disconnect()
-                await _reset_pending_account(user_id)
+            except FloodWait as exc:
+                await _fail_account_login(message, user_id, _FLOOD_WAIT_TEXT.format(exc.value), client)
                 return
-            except errors.PhoneNumberInvalid:
-                await message.reply("Telegram rejected this phone number.")
-                await client.disconnect()
-                await _reset_pending_account(user_id)
+            except PhoneNumberInvalid:
+                await _fail_account_login(message, user_id, "Telegram rejected this phone number.", client)
                 return
             except Exception:
-                await message.reply("Failed to send the confirmation code. Try again later.")
-                await client.disconnect()
-                await _reset_pending_account(user_id)
+                await _fail_account_login(
+                    message, user_id, "Failed to send the confirmation code. Try again later.", client
+                )
                 return
-            account_state.client = client
-            account_state.phone_number = phone
-            account_state.phone_code_hash = sent.phone_code_hash
-            account_state.session_name = session_name
-            account_state.stage = "await_code"
-            account_state.code_buffer = ""
+            state.client = client
+            state.phone_number = phone
+            state.phone_code_hash = sent.phone_code_hash
+            state.session_name = session_name
+            state.stage = "await_code"
+            state.code_buffer = ""
             prompt = await message.reply(
-                _code_prompt_text(account_state.code_buffer),
-                reply_markup=_build_code_input_keyboard(account_state.code_buffer),
+                _code_prompt_text(state.code_buffer),
+                reply_markup=_CODE_INPUT_KB,
             )
-            account_state.prompt_message_id = prompt.message_id
+            state.prompt_message_id = prompt.message_id
             return
-        if account_state.stage == "await_code":
-            code = (message.text or "").replace(" ", "")
+        if state.stage == "await_code":
+            # Codes are often pasted with spaces or line breaks between digit groups.
+            code = "".join(text.split())
             if not code:
                 await message.reply("Please enter the code that Telegram sent.")
                 return
-            client = account_state.client
+            client = state.client
             if client is None:
-                await message.reply("Session lost. Start over.")
-                await _reset_pending_account(user_id)
+                await _fail_account_login(message, user_id, "Session lost. Start over.")
                 return
             try:
                 if not client.is_connected:
                     await client.connect()
                 await client.sign_in(
-                    account_state.phone_number,
+                    state.phone_number,
                     code,
-                    phone_code_hash=account_state.phone_code_hash,
+                    phone_code_hash=state.phone_code_hash,
                 )
-            except errors.FloodWait as exc:
-                await message.reply(f"Too many attempts. Try again in {exc.value} seconds.")
+            except FloodWait as exc:
+                await message.reply(_FLOOD_WAIT_TEXT.format(exc.value))
                 return
-            except errors.SessionPasswordNeeded:
-                account_state.stage = "await_password"
-                account_state.code_buffer = ""
-                prompt_id = account_state.prompt_message_id
+            except SessionPasswordNeeded:
+                state.stage = "await_password"
+                state.code_buffer = ""
+                prompt_id = state.prompt_message_id
                 if prompt_id:
                     try:
                         await bot.edit_message_text(
-                            _code_prompt_text(account_state.code_buffer),
+                            _code_prompt_text(state.code_buffer),
                             message.chat.id,
                             prompt_id,
                             reply_markup=None,
-                            parse_mode="HTML",
                         )
                     except Exception:
                         pass
                 await message.reply("This account has a password. Send the password now.")
                 return
-            except errors.PhoneCodeInvalid:
-                account_state.code_buffer = ""
-                prompt_id = account_state.prompt_message_id
+            except PhoneCodeInvalid:
+                state.code_buffer = ""
+                prompt_id = state.prompt_message_id
                 if prompt_id:
                     try:
                         await bot.edit_message_text(
-                            _code_prompt_text(account_state.code_buffer),
+                            _code_prompt_text(state.code_buffer),
                             message.chat.id,
                             prompt_id,
-                            reply_markup=_build_code_input_keyboard(account_state.code_buffer),
-                            parse_mode="HTML",
+                            reply_markup=_CODE_INPUT_KB,
                         )
                     except Exception:
                         pass
                 await message.reply("Invalid code. Try again.")
                 return
             except Exception:
-                await message.reply("Sign-in failed. Try again later.")
-                await _reset_pending_account(user_id)
+                await _fail_account_login(message, user_id, "Sign-in failed. Try again later.")
                 return
-            await client.disconnect()
-            session_name = account_state.session_name or f"account_{int(time.time())}"
-            phone_number = account_state.phone_number
-            pending_accounts.pop(user_id, None)
-            await db.add_pyrogram_account(session_name, phone_number)
-            await account_pool.refresh()
-            prompt_id = account_state.prompt_message_id
+            prompt_id = state.prompt_message_id
             if prompt_id:
                 try:
                     await bot.edit_message_text(
@@ -1065,83 +1185,73 @@ async def handle_admin_inputs(
                     )
                 except Exception:
                     pass
-            await message.reply("Account added.")
+            await asyncio.gather(
+                _complete_account_login(user_id, state, client, db, account_pool),
+                message.reply("Account added."),
+            )
             return
-        if account_state.stage == "await_password":
-            password = message.text or ""
+        if state.stage == "await_password":
+            password = text
             if not password:
                 await message.reply("Please provide the two-factor password.")
                 return
-            client = account_state.client
+            client = state.client
             if client is None:
-                await message.reply("Session lost. Start over.")
-                await _reset_pending_account(user_id)
+                await _fail_account_login(message, user_id, "Session lost. Start over.")
                 return
             try:
                 if not client.is_connected:
                     await client.connect()
                 await client.check_password(password)
-            except errors.PasswordHashInvalid:
+            except PasswordHashInvalid:
                 await message.reply("Incorrect password. Try again.")
                 return
             except Exception:
-                await message.reply("Failed to confirm password.")
-                await _reset_pending_account(user_id)
+                await _fail_account_login(message, user_id, "Failed to confirm password.")
                 return
-            await client.disconnect()
-            session_name = account_state.session_name or f"account_{int(time.time())}"
-            phone_number = account_state.phone_number
-            pending_accounts.pop(user_id, None)
-            await db.add_pyrogram_account(session_name, phone_number)
-            await account_pool.refresh()
-            await message.reply("Account added.")
+            await asyncio.gather(
+                _complete_account_login(user_id, state, client, db, account_pool),
+                message.reply("Account added."),
+            )
             return
         return
 
-    rep_state = pending_reputation.get(user_id)
-    if rep_state and rep_state.stage == "await_data":
-        args = shlex.split(message.text or "")
+    if isinstance(state, PendingReputation) and state.stage == "await_data":
+        args = text.split()
         if len(args) < 3:
             await message.reply("Usage: username +10 -3 [chat_id]")
             return
         target = args[0].lstrip("@")
-        try:
-            positive = int(args[1])
-            negative = int(args[2])
-        except ValueError:
+        positive = _parse_int(args[1])
+        negative = _parse_int(args[2])
+        if positive is None or negative is None:
             await message.reply("Adjustments must be numbers.")
             return
-        chat_id = int(args[3]) if len(args) > 3 and args[3].lstrip("-+").isdigit() else None
+        chat_id = _parse_int(args[3]) if len(args) > 3 else None
         note = "Manual adjustment via admin panel"
         await db.add_manual_adjustment(target, chat_id, positive, negative, note, user_id)
-        pending_reputation.pop(user_id, None)
+        _finish_pending(user_id, state)
         await message.reply("Adjustment saved.")
         return
 
-    broadcast_state = pending_broadcast.get(user_id)
-    if broadcast_state:
-        if broadcast_state.stage == "await_content":
-            broadcast_state.content_chat_id = message.chat.id
-            broadcast_state.content_message_id = message.message_id
-            broadcast_state.stage = "await_button_choice"
+    if isinstance(state, PendingBroadcast):
+        if state.stage == "await_content":
+            state.content_chat_id = message.chat.id
+            state.content_message_id = message.message_id
+            state.stage = "await_button_choice"
             await message.reply("Add a button to the broadcast?", reply_markup=build_broadcast_button_choice())
             return
-        if broadcast_state.stage == "await_button_text":
-            if not message.text:
-                await message.reply("Send the button caption.")
-                return
-            broadcast_state.button_text = message.text
-            broadcast_state.stage = "await_button_url"
-            prompt = await message.reply("Send the button URL.")
-            broadcast_state.prompt_message_id = prompt.message_id
-            return
-        if broadcast_state.stage == "await_button_url":
-            if not message.text:
-                await message.reply("Send the button URL.")
+        if state.stage == "await_button":
+            button_text, _, button_url = text.partition("\n")
+            button_text, button_url = button_text.strip(), button_url.strip()
+            if not button_text or not button_url:
+                await message.reply("Send the button caption and URL on two separate lines.")
                 return
-            broadcast_state.button_url = message.text
-            broadcast_state.stage = "await_button_choice"
-            await perform_broadcast(message, bot, db, user_id, broadcast_state)
+            state.button_text = button_text
+            state.button_url = button_url
+            _finish_pending(user_id, state)
+            start_broadcast(message, bot, db, state)
+            await message.reply("Broadcast started.")
             return
         return
 
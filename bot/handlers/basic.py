@@ -10,6 +10,7 @@ from aiogram.types.chat_member_updated import ChatMemberUpdated
 
 from ..config import Settings
 from ..database import Database
+from ..services.models import GroupRecord
 
 router = Router(name="basic")
 
@@ -38,8 +39,8 @@ async def on_start(message: Message, settings: Settings) -> None:
     await message.answer(text, reply_markup=PRIVATE_MENU)
 
 
-def _information_text(groups: list[dict]) -> str:
-    active = [item for item in groups if item.get("is_active")]
+def _information_text(groups: list[GroupRecord]) -> str:
+    active = [item for item in groups if item.is_active]
     if not active:
         return (
             "No active groups are registered yet. Invite the bot to a group and run /id so the "
@@ -48,9 +49,9 @@ def _information_text(groups: list[dict]) -> str:
 
     lines = ["<b>Active reputation groups</b>"]
     for group in active:
-        title = group.get("title") or ""
-        username = group.get("username")
-        identifier = f"ID {group['chat_id']}"
+        title = group.title or ""
+        username = group.username
+        identifier = f"ID {group.chat_id}"
         if title and username:
             display = f"{escape(title)} (@{escape(username)})"
         elif title:
@@ -58,7 +58,6 @@ async def detail_view(callback: CallbackQuery, db: Database) -> None:
     if callback.message is not None:
         await callback.message.answer(
             detail_text,
-            disable_web_page_preview=True,
             reply_markup=keyboard,
         )
         await callback.answer("Готово")
@@ -69,7 +68,6 @@ async def detail_view(callback: CallbackQuery, db: Database) -> None:
             await callback.bot.send_message(
                 callback.from_user.id,
                 detail_text,
-                disable_web_page_preview=True,
                 reply_markup=keyboard,
             )
         except (TelegramForbiddenError, TelegramBadRequest):
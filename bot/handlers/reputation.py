@@ -106,11 +106,9 @@ async def rep_command(
     await message.reply(
         message_text,
         reply_markup=keyboard,
-        disable_web_page_preview=True,
     )
 
-    await db.increment_user_requests(message.from_user.id)
-    await db.log_request(message.from_user.id, target_clean, chat_id)
+    await db.record_request(message.from_user.id, target_clean, chat_id)
 
 
 def build_inline_article(summary: ReputationSummary) -> InlineQueryResultArticle:
@@ -122,8 +120,6 @@ def build_inline_article(summary: ReputationSummary) -> InlineQueryResultArticle
         description=f"Положительных: {summary.positive} | Отрицательных: {summary.negative}",
         input_message_content=InputTextMessageContent(
             message_text=message_text,
-            parse_mode="HTML",
-            disable_web_page_preview=True,
         ),
         reply_markup=keyboard,
     )
@@ -183,7 +179,6 @@ async def inline_rep(
                     description="Введи: rep username или rep username \"Название чата\"",
                     input_message_content=InputTextMessageContent(
                         message_text="Введите запрос в формате <code>rep username</code> или добавьте название чата в кавычках.",
-                        parse_mode="HTML",
                     ),
                 )
             ],
@@ -215,8 +210,6 @@ async def inline_rep(
             description=f"Положительных: {summary.positive} | Отрицательных: {summary.negative}",
             input_message_content=InputTextMessageContent(
                 message_text=message_text,
-                parse_mode="HTML",
-                disable_web_page_preview=True,
             ),
             reply_markup=build_detail_keyboard(summary.target, summary.chat_id),
         )
@@ -224,7 +217,6 @@ async def inline_rep(
     await query.answer([article], cache_time=0, is_personal=True)
 
     if user:
-        await db.increment_user_requests(user.id)
-        await db.log_request(user.id, target_clean, chat_id)
+        await db.record_request(user.id, target_clean, chat_id)
 
 
@@ -5,6 +5,7 @@ import asyncio
 from pathlib import Path
 
 from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
 from .config import Settings
@@ -14,11 +15,19 @@ from .logging import setup_logging
 from .services.account_pool import PyrogramAccountPool
 from .services.reputation_fetcher import ReputationFetcher
 
+try:
+    import uvloop
+except ImportError:  # not installed on Windows
+    uvloop = None
+
 
 async def main() -> None:
     settings = Settings.load()
     setup_logging(settings.log_level, settings.log_file)
-    bot = Bot(settings.token, parse_mode=ParseMode.HTML)
+    bot = Bot(
+        settings.token,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML, link_preview_is_disabled=True),
+    )
     db = Database(settings.database_path)
     await db.connect()
     if settings.paused:
@@ -26,8 +35,8 @@ async def main() -> None:
 
     session_dir = Path("data") / "pyrogram_sessions"
     account_pool = PyrogramAccountPool(db, session_dir)
-    api_id_raw = await db.get_setting("pyrogram_api_id")
-    api_hash = await db.get_setting("pyrogram_api_hash")
+    credentials = await db.get_settings("pyrogram_api_id", "pyrogram_api_hash")
+    api_id_raw, api_hash = credentials["pyrogram_api_id"], credentials["pyrogram_api_hash"]
     api_id = int(api_id_raw) if api_id_raw else None
     await account_pool.configure(api_id, api_hash)
 
@@ -47,9 +56,13 @@ async def main() -> None:
     try:
         await dp.start_polling(bot)
     finally:
+        await admin.cancel_broadcasts()
         await account_pool.close()
         await db.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
@@ -160,22 +160,19 @@ async def _backfill_chat(
             break
 
         # get_chat_history returns newest -> oldest; process oldest first
+        chunk_entries: List[ReputationEntry] = []
         for message in reversed(messages):
             processed += 1
             max_message_id = max(max_message_id, message.id)
             try:
-                entries = await _build_entries(message, chat.id)
+                chunk_entries.extend(await _build_entries(message, chat.id))
             except Exception:  # pragma: no cover - unexpected parsing errors shouldn't abort
                 LOGGER.exception("Failed to parse message %s in chat %s", message.id, chat_reference)
-                await _respect_rate_limits(processed)
-                continue
-
-            if entries:
-                inserted = await db.store_reputation_entries(entries)
-                if inserted:
-                    stored += inserted
             await _respect_rate_limits(processed)
 
+        if chunk_entries:
+            stored += await db.store_reputation_entries(chunk_entries)
+
         current_offset = messages[-1].id
         if remaining is not None:
             remaining -= len(messages)
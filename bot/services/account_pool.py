@@ -19,6 +19,7 @@ class PyrogramAccountPool:
         self._db = db
         self._session_dir = session_dir
         self._session_dir.mkdir(parents=True, exist_ok=True)
+        self._workdir = str(session_dir.resolve())
         self._clients: Dict[str, Client] = {}
         self._order: List[str] = []
         self._index: int = 0
@@ -26,6 +27,11 @@ class PyrogramAccountPool:
         self._api_id: Optional[int] = None
         self._api_hash: Optional[str] = None
 
+    @property
+    def workdir(self) -> str:
+        """Resolved session directory, created when the pool is constructed."""
+        return self._workdir
+
     async def configure(self, api_id: Optional[int], api_hash: Optional[str]) -> None:
         async with self._lock:
             if self._api_id == api_id and self._api_hash == api_hash:
@@ -82,7 +88,7 @@ class PyrogramAccountPool:
                 name=session_name,
                 api_id=self._api_id,
                 api_hash=self._api_hash,
-                workdir=str(self._session_dir.resolve()),
+                workdir=self._workdir,
                 no_updates=True,
             )
             try:
@@ -52,6 +52,37 @@ class ReputationSummary:
         return self.total > 0
 
 
+@dataclass(slots=True, frozen=True)
+class UserRecord:
+    user_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    request_count: int
+    blocked: bool
+    last_request_at: Optional[str]
+
+
+@dataclass(slots=True, frozen=True)
+class GroupRecord:
+    chat_id: int
+    title: Optional[str]
+    username: Optional[str]
+    is_active: bool
+    added_at: Optional[str]
+
+
+@dataclass(slots=True, frozen=True)
+class ManualAdjustment:
+    target: str
+    chat_id: Optional[int]
+    positive_delta: int
+    negative_delta: int
+    note: Optional[str]
+    created_at: Optional[str]
+    created_by: Optional[int]
+
+
 @dataclass(slots=True)
 class BroadcastPayload:
     text: str
@@ -14,6 +14,8 @@ from .reputation_detector import ParsedReputation, SIGN_ONLY_PATTERN, extract_re
 
 LOGGER = logging.getLogger(__name__)
 
+STORE_CHUNK_SIZE = 50  # parsed entries written per store call while a search is still running
+
 
 async def _parse_reputation_from_message(message: Message) -> List[ParsedReputation]:
     text = (message.text or message.caption or "").strip()
@@ -62,7 +64,7 @@ async def _build_entries(message: Message, chat_id: int) -> List[ReputationEntry
     for item in parsed:
         entries.append(
             ReputationEntry(
-                target=item.target.lower(),
+                target=item.target,
                 chat_id=chat_id,
                 message_id=message.id,
                 sentiment=item.sentiment,
@@ -103,11 +105,19 @@ class ReputationFetcher:
             await asyncio.sleep(exc.value + 1)
             iterator = client.search_messages(chat_id, query=target, limit=self._per_chat_limit)
 
-        async for message in iterator:
-            try:
-                entries = await _build_entries(message, chat_id)
-            except Exception:
-                LOGGER.exception("Failed to parse message %s in chat %s", message.id, chat_id)
-                continue
+        entries: List[ReputationEntry] = []
+        try:
+            async for message in iterator:
+                try:
+                    entries.extend(await _build_entries(message, chat_id))
+                except Exception:
+                    LOGGER.exception("Failed to parse message %s in chat %s", message.id, chat_id)
+                    continue
+                if len(entries) >= STORE_CHUNK_SIZE:
+                    # Hand the chunk off first so a failed store is not retried by the finally block.
+                    chunk, entries = entries, []
+                    await self._db.store_reputation_entries(chunk)
+        finally:
+            # Keep whatever was fetched before a FloodWait or network error cut the search short.
             if entries:
                 await self._db.store_reputation_entries(entries)
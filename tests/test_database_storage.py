@@ -0,0 +1,368 @@
+import asyncio
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from bot.database import COMMIT_MAX_ATTEMPTS, Database
+from bot.services.models import ReputationEntry
+
+
+def _entry(target: str, message_id: int, sentiment: str = "positive") -> ReputationEntry:
+    return ReputationEntry(
+        target=target,
+        chat_id=-100,
+        message_id=message_id,
+        sentiment=sentiment,
+        has_photo=False,
+        has_media=False,
+        content=f"+rep @{target}",
+        author_id=42,
+        author_username="tester",
+        message_date=datetime.utcnow(),
+    )
+
+
+def test_store_reputation_entries_counts_only_new_rows(tmp_path: Path) -> None:
+    db = Database(tmp_path / "reputation.sqlite")
+
+    async def scenario() -> None:
+        await db.connect()
+        try:
+            first = await db.store_reputation_entries([_entry("alpha", 1), _entry("beta", 1)])
+            assert first == 2
+
+            second = await db.store_reputation_entries([_entry("alpha", 1), _entry("alpha", 2)])
+            assert second == 1
+
+            assert await db.store_reputation_entries([]) == 0
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_queued_writes_are_visible_and_durable(tmp_path: Path) -> None:
+    db_path = tmp_path / "reputation.sqlite"
+
+    async def scenario() -> None:
+        db = Database(db_path)
+        await db.connect()
+        try:
+            await db.register_group(-100, "Chat", None, "supergroup")
+            await db.deactivate_group(-100)
+            groups = await db.list_groups()
+            assert [group.is_active for group in groups] == [False]
+
+            await db.set_setting("pyrogram_api_id", "12345")
+        finally:
+            await db.close()
+
+        reopened = Database(db_path)
+        await reopened.connect()
+        try:
+            assert await reopened.get_setting("pyrogram_api_id") == "12345"
+            assert await reopened.active_group_ids() == []
+        finally:
+            await reopened.close()
+
+    asyncio.run(scenario())
+
+
+def test_pause_state_survives_reconnect(tmp_path: Path) -> None:
+    db_path = tmp_path / "reputation.sqlite"
+
+    async def scenario() -> None:
+        db = Database(db_path)
+        await db.connect()
+        try:
+            assert await db.is_paused() is False
+            await db.toggle_pause(True)
+            assert await db.is_paused() is True
+        finally:
+            await db.close()
+
+        reopened = Database(db_path)
+        await reopened.connect()
+        try:
+            assert await reopened.is_paused() is True
+        finally:
+            await reopened.close()
+
+    asyncio.run(scenario())
+
+
+def test_close_waits_for_in_flight_flush(tmp_path: Path) -> None:
+    db_path = tmp_path / "reputation.sqlite"
+
+    async def scenario() -> None:
+        db = Database(db_path)
+        await db.connect()
+        for user_id in range(1, 51):
+            await db.ensure_user(user_id, f"user{user_id}", None, None)
+        # Let the background loop start its flush, then close while it runs.
+        await asyncio.sleep(0.03)
+        await db.close()
+
+        reopened = Database(db_path)
+        await reopened.connect()
+        try:
+            assert len(await reopened.top_users(limit=100)) == 50
+        finally:
+            await reopened.close()
+
+    asyncio.run(scenario())
+
+
+def test_transaction_commits_together_or_not_at_all(tmp_path: Path) -> None:
+    db = Database(tmp_path / "reputation.sqlite")
+
+    async def scenario() -> None:
+        await db.connect()
+        try:
+            async with db.transaction():
+                await db.set_setting("pyrogram_api_id", "1")
+                await db.set_setting("pyrogram_api_hash", "hash")
+            assert await db.get_setting("pyrogram_api_hash") == "hash"
+
+            try:
+                async with db.transaction():
+                    await db.set_setting("pyrogram_api_id", "2")
+                    raise RuntimeError("abort")
+            except RuntimeError:
+                pass
+            assert await db.get_setting("pyrogram_api_id") == "1"
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_find_group_by_title_ignores_case(tmp_path: Path) -> None:
+    db = Database(tmp_path / "reputation.sqlite")
+
+    async def scenario() -> None:
+        await db.connect()
+        try:
+            await db.register_group(-100, "Market Chat", "MarketChat", "supergroup")
+            assert await db.find_group_by_title("market chat") == (-100, "Market Chat")
+            assert await db.find_group_by_title("@marketchat") == (-100, "Market Chat")
+            assert await db.find_group_by_title("other") is None
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_record_request_counts_and_logs(tmp_path: Path) -> None:
+    db = Database(tmp_path / "reputation.sqlite")
+
+    async def scenario() -> None:
+        await db.connect()
+        try:
+            await db.ensure_user(7, "tester", None, None)
+            await db.record_request(7, "alpha", None)
+            await db.record_request(7, "beta", -100)
+
+            [user] = await db.top_users()
+            assert user.request_count == 2
+            stats = await db.fetch_statistics()
+            assert stats["total_requests"] == 2
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_blocked_users_are_cached_and_persisted(tmp_path: Path) -> None:
+    db_path = tmp_path / "reputation.sqlite"
+
+    async def scenario() -> None:
+        db = Database(db_path)
+        await db.connect()
+        try:
+            await db.ensure_user(1, "first", None, None)
+            await db.ensure_user(2, "second", None, None)
+            assert await db.set_user_blocked(1, True) is True
+            assert await db.set_user_blocked(2, True) is True
+            assert await db.set_user_blocked(2, False) is True
+            assert await db.set_user_blocked(3, False) is False
+            assert await db.is_user_blocked(1) is True
+            assert await db.is_user_blocked(2) is False
+            assert await db.is_user_blocked(3) is False
+        finally:
+            await db.close()
+
+        reopened = Database(db_path)
+        await reopened.connect()
+        try:
+            assert await reopened.is_user_blocked(1) is True
+            assert await reopened.is_user_blocked(2) is False
+            assert await reopened.active_user_ids() == [2]
+        finally:
+            await reopened.close()
+
+    asyncio.run(scenario())
+
+
+def test_get_settings_reads_several_keys_at_once(tmp_path: Path) -> None:
+    db_path = tmp_path / "reputation.sqlite"
+
+    async def scenario() -> None:
+        db = Database(db_path)
+        await db.connect()
+        try:
+            await db.set_setting("pyrogram_api_id", "12345")
+            await db.set_setting("pyrogram_api_hash", "hash")
+        finally:
+            await db.close()
+
+        reopened = Database(db_path)
+        await reopened.connect()
+        try:
+            assert await reopened.get_settings("pyrogram_api_id", "pyrogram_api_hash", "missing") == {
+                "pyrogram_api_id": "12345",
+                "pyrogram_api_hash": "hash",
+                "missing": None,
+            }
+            await reopened.set_setting("pyrogram_api_hash", None)
+            assert await reopened.get_setting("pyrogram_api_hash") is None
+        finally:
+            await reopened.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_keeps_queued_writes(tmp_path: Path) -> None:
+    db_path = tmp_path / "reputation.sqlite"
+
+    async def scenario() -> None:
+        db = Database(db_path)
+        await db.connect()
+        blocker = sqlite3.connect(db_path)
+        try:
+            await db.conn.execute("PRAGMA busy_timeout = 0")
+            blocker.execute("BEGIN IMMEDIATE")
+            await db.set_setting("pyrogram_api_id", "12345")
+            with pytest.raises(sqlite3.OperationalError):
+                await db.flush()
+            blocker.rollback()
+            await db.flush()
+        finally:
+            blocker.close()
+            await db.close()
+
+        reopened = Database(db_path)
+        await reopened.connect()
+        try:
+            assert await reopened.get_setting("pyrogram_api_id") == "12345"
+        finally:
+            await reopened.close()
+
+    asyncio.run(scenario())
+
+
+def test_write_that_keeps_failing_is_dropped_without_blocking_others(tmp_path: Path) -> None:
+    db_path = tmp_path / "reputation.sqlite"
+
+    async def scenario() -> None:
+        db = Database(db_path)
+        await db.connect()
+        try:
+            # settings.value is NOT NULL, so this row can never be committed.
+            await db._execute_write("INSERT INTO settings (key, value) VALUES (?, NULL)", ("broken",))
+            await db.set_setting("pyrogram_api_id", "12345")
+            for _ in range(COMMIT_MAX_ATTEMPTS):
+                try:
+                    await db.flush()
+                except sqlite3.IntegrityError:
+                    assert await db.top_users() == []
+                else:
+                    break
+            assert not db._pending
+        finally:
+            await db.close()
+
+        reopened = Database(db_path)
+        await reopened.connect()
+        try:
+            assert await reopened.get_settings("broken", "pyrogram_api_id") == {
+                "broken": None,
+                "pyrogram_api_id": "12345",
+            }
+        finally:
+            await reopened.close()
+
+    asyncio.run(scenario())
+
+
+def test_store_reputation_entries_folds_target_case(tmp_path: Path) -> None:
+    db_path = tmp_path / "reputation.sqlite"
+    # Databases created before COLLATE NOCASE keep this case-sensitive UNIQUE constraint.
+    legacy = sqlite3.connect(db_path)
+    legacy.execute(
+        """
+        CREATE TABLE reputation_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            target TEXT NOT NULL,
+            chat_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            sentiment TEXT NOT NULL,
+            has_photo INTEGER DEFAULT 0,
+            has_media INTEGER DEFAULT 0,
+            content TEXT,
+            author_id INTEGER,
+            author_username TEXT,
+            message_date INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(target, chat_id, message_id)
+        )
+        """
+    )
+    legacy.close()
+    db = Database(db_path)
+
+    async def scenario() -> None:
+        await db.connect()
+        try:
+            assert await db.store_reputation_entries([_entry("Alpha", 1), _entry("alpha", 1)]) == 1
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_aborted_transaction_restores_pause_state(tmp_path: Path) -> None:
+    db = Database(tmp_path / "reputation.sqlite")
+
+    async def scenario() -> None:
+        await db.connect()
+        try:
+            with pytest.raises(RuntimeError):
+                async with db.transaction():
+                    await db.toggle_pause(True)
+                    raise RuntimeError("abort")
+            assert await db.is_paused() is False
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
+
+
+def test_positive_share_rounds_halves_to_even(tmp_path: Path) -> None:
+    db = Database(tmp_path / "reputation.sqlite")
+
+    async def scenario() -> None:
+        await db.connect()
+        try:
+            entries = [_entry("alpha", 1)] + [_entry("alpha", message_id, "negative") for message_id in range(2, 9)]
+            await db.store_reputation_entries(entries)
+            stats = await db.fetch_enhanced_statistics()
+            # 1 of 8 is 12.5%, which round() takes to 12 where SQLite's ROUND() would give 13.
+            assert stats["positive_share"] == 12
+            assert stats["top_targets"][0]["positive_share"] == 12
+        finally:
+            await db.close()
+
+    asyncio.run(scenario())
@@ -1,7 +1,7 @@
 from datetime import datetime
 from pathlib import Path
 
-from bot.database import Database
+from bot.database import Database, build_message_link
 from bot.services.models import ReputationEntry
 
 
@@ -75,3 +75,152 @@ def test_fetch_summary_handles_legacy_targets(tmp_path: Path) -> None:
     import asyncio
 
     asyncio.run(scenario())
+
+
+def test_fetch_summary_combines_adjustments_and_chat_title(tmp_path: Path) -> None:
+    db_path = tmp_path / "reputation.sqlite"
+    db = Database(db_path)
+
+    async def scenario() -> None:
+        await db.connect()
+        try:
+            await db.register_group(-100, "Main Chat", None, "supergroup")
+            await db.store_reputation_entries(
+                [
+                    ReputationEntry(
+                        target="uglymove",
+                        chat_id=-100,
+                        message_id=message_id,
+                        sentiment=sentiment,
+                        has_photo=False,
+                        has_media=False,
+                        content="rep",
+                        author_id=42,
+                        author_username="tester",
+                        message_date=datetime.utcnow(),
+                    )
+                    for message_id, sentiment in ((1, "positive"), (2, "negative"), (3, "positive"))
+                ]
+            )
+            await db.add_manual_adjustment("UglyMove", -100, 5, 2, None, 1)
+
+            summary = await db.fetch_summary("uglymove", -100, limit=2)
+            assert summary.chat_title == "Main Chat"
+            assert summary.positive == 7
+            assert summary.negative == 3
+            assert summary.details_total == 3
+            assert len(summary.details) == 2
+
+            overall = await db.fetch_summary("uglymove")
+            assert overall.chat_title is None
+            assert overall.positive == 7
+        finally:
+            await db.close()
+
+    import asyncio
+
+    asyncio.run(scenario())
+
+
+def test_build_message_link_for_supergroups_and_plain_chats() -> None:
+    assert build_message_link(-1001234567890, 42) == "https://t.me/c/1234567890/42"
+    assert build_message_link(-4242, 7) == "https://t.me/-4242/7"
+
+
+def test_reputation_rollup_ignores_duplicates_and_backfills(tmp_path: Path) -> None:
+    db_path = tmp_path / "reputation.sqlite"
+
+    def entry(target: str, message_id: int, sentiment: str) -> ReputationEntry:
+        return ReputationEntry(
+            target=target,
+            chat_id=-100,
+            message_id=message_id,
+            sentiment=sentiment,
+            has_photo=False,
+            has_media=message_id == 1,
+            content=f"rep @{target}",
+            author_id=42,
+            author_username="tester",
+            message_date=datetime.utcnow(),
+        )
+
+    async def scenario() -> None:
+        db = Database(db_path)
+        await db.connect()
+        try:
+            await db.store_reputation_entries([entry("alpha", 1, "positive"), entry("alpha", 2, "negative")])
+            await db.store_reputation_entries([entry("alpha", 1, "positive"), entry("alpha", 3, "positive")])
+
+            summary = await db.fetch_summary("alpha")
+            assert (summary.positive, summary.negative, summary.positive_with_media) == (2, 1, 1)
+            assert summary.details_total == 3
+
+            # Simulate a database created before the rollup table existed.
+            await db.conn.execute("DELETE FROM reputation_rollup")
+            await db.conn.execute("PRAGMA user_version = 0")
+            await db.conn.commit()
+        finally:
+            await db.close()
+
+        reopened = Database(db_path)
+        await reopened.connect()
+        try:
+            summary = await reopened.fetch_summary("alpha", chat_id=-100)
+            assert (summary.positive, summary.negative, summary.details_total) == (2, 1, 3)
+            stats = await reopened.fetch_enhanced_statistics()
+            assert stats["top_targets"][0]["target"] == "alpha"
+            assert stats["top_targets"][0]["total"] == 3
+        finally:
+            await reopened.close()
+
+    import asyncio
+
+    asyncio.run(scenario())
+
+
+def test_fetch_enhanced_statistics_totals(tmp_path: Path) -> None:
+    db = Database(tmp_path / "reputation.sqlite")
+
+    async def scenario() -> None:
+        await db.connect()
+        try:
+            empty = await db.fetch_enhanced_statistics()
+            assert empty["total_entries"] == 0
+            assert empty["active_days"] == 0
+            assert empty["positive_share"] == 0
+            assert empty["first_entry_at"] is None
+
+            await db.store_reputation_entries(
+                [
+                    ReputationEntry(
+                        target="alpha",
+                        chat_id=-100,
+                        message_id=message_id,
+                        sentiment=sentiment,
+                        has_photo=False,
+                        has_media=False,
+                        content="rep @alpha",
+                        author_id=42,
+                        author_username="tester",
+                        message_date=datetime.utcnow(),
+                    )
+                    for message_id, sentiment in enumerate(("positive", "positive", "positive", "negative"))
+                ]
+            )
+            await db.register_group(-100, "Chat", None, "supergroup")
+
+            stats = await db.fetch_enhanced_statistics()
+            assert stats["active_groups"] == 1
+            assert stats["total_entries"] == 4
+            assert (stats["positive_total"], stats["negative_total"], stats["balance_total"]) == (3, 1, 2)
+            assert stats["positive_share"] == 75
+            assert stats["recent_30_days"] == 4
+            assert stats["active_days"] == 1
+            assert stats["daily_average"] == 4.0
+            assert stats["first_entry_at"] is not None
+        finally:
+            await db.close()
+
+    import asyncio
+
+    asyncio.run(scenario())